@@ -0,0 +1,127 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks are plain scripts, run them from the repository root:
+
+    python benchmarks/search.py
+"""
+
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+_SYLLABLES = (
+    "ва",
+    "ле",
+    "ни",
+    "ко",
+    "ла",
+    "ев",
+    "ан",
+    "др",
+    "ей",
+    "ми",
+    "ха",
+    "ил",
+    "се",
+    "рг",
+    "ге",
+    "ор",
+    "ги",
+    "пе",
+    "тр",
+    "ов",
+    "ин",
+    "нк",
+    "ку",
+    "зн",
+    "ец",
+    "ло",
+    "ви",
+    "но",
+    "гр",
+    "ад",
+    "ст",
+    "ро",
+    "бе",
+    "ус",
+    "мо",
+    "зо",
+)
+_PATRONYMIC_ENDINGS = ("ович", "евич", "овна", "евна")
+
+
+def fake_word(rnd: random.Random, low: int = 2, high: int = 4) -> str:
+    return "".join(rnd.choice(_SYLLABLES) for _ in range(rnd.randint(low, high)))
+
+
+def fake_names(count: int, seed: int = 42) -> list[str]:
+    """Deterministic "Фамилия Имя Отчество"-like names."""
+    rnd = random.Random(seed)
+    return [
+        f"{fake_word(rnd).capitalize()}ов {fake_word(rnd, 1, 2).capitalize()} "
+        f"{fake_word(rnd, 1, 2).capitalize()}{rnd.choice(_PATRONYMIC_ENDINGS)}"
+        for _ in range(count)
+    ]
+
+
+def fake_titles(count: int, seed: int = 7) -> list[str]:
+    """Deterministic subject-like titles of one to three words."""
+    rnd = random.Random(seed)
+    return [
+        " ".join(fake_word(rnd) for _ in range(rnd.randint(1, 3))).capitalize()
+        for _ in range(count)
+    ]
+
+
+def measure(fn: Callable[[], object], repeat: int = 5) -> float:
+    """Median wall time of ``fn`` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def report(title: str, rows: list[tuple]) -> None:
+    print(f"\n{title}")
+    for row in rows:
+        print("  " + " | ".join(str(col).rjust(12) for col in row))
+
+
+async def asgi_throughput(
+    app: Callable, path: str, count: int, headers: Iterable[tuple[bytes, bytes]] = ()
+) -> float:
+    """Requests per second to GET ``path``, driving the ASGI app directly"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), *headers],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(dict(scope), receive, send)
+    return count / (time.perf_counter() - start)
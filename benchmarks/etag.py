@@ -0,0 +1,73 @@
+"""ETag middleware: BaseHTTPMiddleware vs the pure ASGI core.etag.
+
+python benchmarks/etag.py [requests]
+"""
+
+import asyncio
+import sys
+
+from common import asgi_throughput, report
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from core.cache import get_data_version
+from core.etag import ETagMiddleware, path_resource
+
+
+class LegacyETagMiddleware(BaseHTTPMiddleware):
+    """ETagMiddleware as it was before the pure ASGI rewrite"""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method == "GET" and not request.url.path.startswith("/admin"):
+            current_etag = get_data_version(path_resource(request.url.path))
+            client_etag = request.headers.get("if-none-match")
+            if client_etag == current_etag:
+                return Response(status_code=304, headers={"ETag": current_etag})
+            response = await call_next(request)
+            if response.status_code == 200:
+                response.headers["ETag"] = current_etag
+                response.headers["Cache-Control"] = "no-cache"
+            return response
+        return await call_next(request)
+
+
+def make_app(middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware)
+    # A ready serialized body, as /registry serves from its cache
+    body = b'{"teachers":{' + b",".join(b'"%d":"x"' % i for i in range(2000)) + b"}}"
+
+    @app.get("/registry")
+    async def registry():
+        return Response(body, media_type="application/json")
+
+    return app
+
+
+async def run(count: int) -> None:
+    etag = get_data_version(path_resource("/registry"))
+    apps = {
+        "legacy": make_app(LegacyETagMiddleware),
+        "asgi": make_app(ETagMiddleware),
+    }
+    rows = [("response", "legacy, rps", "asgi, rps", "speedup")]
+    for name, client_etag in (("304", etag), ("200", None)):
+        # The first pass builds the middleware stack and warms up
+        rps = {}
+        for key, app in apps.items():
+            headers = [(b"if-none-match", client_etag.encode())] if client_etag else []
+            await asgi_throughput(app, "/registry", count // 10, headers)
+            rps[key] = await asgi_throughput(app, "/registry", count, headers)
+        rows.append(
+            (
+                name,
+                f"{rps['legacy']:.0f}",
+                f"{rps['asgi']:.0f}",
+                f"x{rps['asgi'] / rps['legacy']:.1f}",
+            )
+        )
+    report(f"/registry throughput, {count} requests", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000))
@@ -0,0 +1,54 @@
+"""Memory held by the in-process /search catalog, per entry.
+
+python benchmarks/memory.py [count]
+"""
+
+import gc
+import sys
+import tracemalloc
+from collections.abc import Callable
+
+from common import fake_names, fake_titles, report
+
+from services.search import SearchIndex
+
+
+def traced(build: Callable[[], object]) -> tuple[object, int]:
+    """Object built by ``build`` and the bytes it still holds"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, held
+
+
+def main(count: int) -> None:
+    # Titles come from the database either way and are not counted
+    teachers = [(i, name) for i, name in enumerate(fake_names(count // 2))]
+    subjects = [(i, title) for i, title in enumerate(fake_titles(count // 2))]
+    total = len(teachers) + len(subjects)
+
+    def rows():
+        return (
+            [{"title": t, "id": i} for i, t in teachers],
+            [{"title": t, "id": i} for i, t in subjects],
+        )
+
+    catalog, rows_bytes = traced(rows)
+    _, index_bytes = traced(lambda: SearchIndex(*catalog))
+
+    report(
+        f"/search catalog memory, {total} entries (tracemalloc)",
+        [
+            ("structure", "MiB", "bytes/entry"),
+            ("row dicts", f"{rows_bytes / 2**20:.1f}", rows_bytes // total),
+            ("SearchIndex", f"{index_bytes / 2**20:.1f}", index_bytes // total),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
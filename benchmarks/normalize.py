@@ -0,0 +1,57 @@
+"""normalize(): the original re.sub chain vs services.text.
+
+python benchmarks/normalize.py [count]
+"""
+
+import re
+import sys
+
+from common import fake_names, fake_titles, measure, report
+
+from services.text import normalize, normalize_query
+
+
+def legacy_normalize(text: str) -> str:
+    """normalize() as it was before services.text"""
+    if not text:
+        return ""
+    text = text.lower()
+    text = text.replace("ё", "е")
+    text = re.sub(r"(.)\1+", r"\1", text)
+    text = re.sub(r"[^а-яa-z0-9\s]", "", text)
+    text = " ".join(text.split())
+    return text
+
+
+def main(count: int) -> None:
+    titles = fake_names(count // 2) + [
+        f"{title} (лекции), гр. №{i}!"
+        for i, title in enumerate(fake_titles(count // 2))
+    ]
+    # A search session: few distinct queries typed over and over
+    queries = [title.split()[0][:5] for title in titles[:50]] * (count // 50)
+
+    for fn in (normalize, normalize_query):
+        assert [fn(t) for t in titles] == [legacy_normalize(t) for t in titles]
+
+    rows = [("input", "calls", "legacy, ms", "current, ms", "speedup")]
+    for name, texts, fn in (
+        ("titles", titles, normalize),
+        ("queries", queries, normalize_query),
+    ):
+        legacy = measure(lambda t=texts: [legacy_normalize(x) for x in t])
+        current = measure(lambda t=texts, f=fn: [f(x) for x in t])
+        rows.append(
+            (
+                name,
+                len(texts),
+                f"{legacy:.2f}",
+                f"{current:.2f}",
+                f"x{legacy / current:.1f}",
+            )
+        )
+    report("normalize() over a batch (median)", rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,106 @@
+"""/search latency: the original per-request linear scan vs ReviewsService.
+
+python benchmarks/search.py [sizes...]
+"""
+
+import asyncio
+import sys
+
+from common import fake_names, fake_titles, measure, report
+from rapidfuzz import fuzz
+
+from core.cache import CATALOG, data_versions
+from enums.reviews import SearchType
+from services.reviews import CacheSnapshot, ReviewsService
+from services.search import SearchIndex
+from services.text import normalize
+
+QUERIES = ("ивано", "ко", "петро", "михаил", "ваневич", "леников сег", "зн")
+
+
+def legacy_search(query, strainer, teachers, subjects):
+    """ReviewsService.search as it was before the search index"""
+    normalized_query = normalize(query)
+    cache = {SearchType.teacher: teachers, SearchType.subject: subjects}
+    categories = [strainer] if strainer else [SearchType.teacher, SearchType.subject]
+    raw_results = []
+    for cat in categories:
+        for item in cache.get(cat, []):
+            target_text = normalize(item["title"])
+            if normalized_query in target_text:
+                score = 100
+                priority = 1 if target_text.startswith(normalized_query) else 2
+            else:
+                score = fuzz.partial_ratio(normalized_query, target_text)
+                priority = 3
+            threshold = 75 if priority < 3 else 85
+            if score >= threshold:
+                raw_results.append(
+                    {
+                        "id": item["id"],
+                        "title": item["title"],
+                        "type": cat,
+                        "score": score,
+                        "priority": priority,
+                    }
+                )
+    raw_results.sort(key=lambda x: (x["priority"], -x["score"], x["title"].split()[0]))
+    return [(r["id"], r["type"]) for r in raw_results[:20]]
+
+
+def load_catalog(size: int) -> tuple[list[dict], list[dict]]:
+    teachers = [
+        {"title": name, "id": i} for i, name in enumerate(fake_names(size // 2))
+    ]
+    subjects = [
+        {"title": title, "id": i} for i, title in enumerate(fake_titles(size // 2))
+    ]
+    ReviewsService._snapshot = CacheSnapshot(
+        catalog_version=data_versions.get(CATALOG),
+        search_index=SearchIndex(teachers, subjects),
+    )
+    return teachers, subjects
+
+
+def main(sizes: list[int]) -> None:
+    service = ReviewsService(session=None)
+    loop = asyncio.new_event_loop()
+    rows = [("titles", "query", "legacy, ms", "service, ms", "speedup", "cached, ms")]
+
+    for size in sizes:
+        teachers, subjects = load_catalog(size)
+        for query in QUERIES:
+            expected = legacy_search(query, None, teachers, subjects)
+            actual = loop.run_until_complete(service.search(query, None))
+            assert [(r.id, r.type) for r in actual.results] == expected, query
+
+            legacy = measure(
+                lambda q=query, t=teachers, s=subjects: legacy_search(q, None, t, s),
+                repeat=3,
+            )
+
+            def uncached(q=query):
+                ReviewsService._search_cache.clear()
+                return loop.run_until_complete(service.search(q, None))
+
+            current = measure(uncached)
+            cached = measure(
+                lambda q=query: loop.run_until_complete(service.search(q, None))
+            )
+            rows.append(
+                (
+                    size,
+                    query,
+                    f"{legacy:.2f}",
+                    f"{current:.3f}",
+                    f"x{legacy / current:.1f}",
+                    f"{cached:.3f}",
+                )
+            )
+
+    loop.close()
+    report("/search latency per request (median)", rows)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,84 @@
+"""/teacher serialization: dict re-validated by FastAPI vs one model_dump_json.
+
+python benchmarks/serialize.py [comments]
+"""
+
+import asyncio
+import sys
+
+from common import asgi_throughput, fake_names, fake_titles, report
+from fastapi import FastAPI
+
+from core.responses import PrecompressedJSON, json_response
+from schemas.reviews import (
+    CommentSchema,
+    SourceSchema,
+    SubjectSchema,
+    SummarySchema,
+    TeacherResponse,
+)
+
+
+def make_teacher(comments: int) -> TeacherResponse:
+    subjects = fake_titles(20)
+    return TeacherResponse(
+        id=1,
+        name=fake_names(1)[0],
+        summaries=[
+            SummarySchema(title=title, value=" ".join(fake_titles(30, seed=i)))
+            for i, title in enumerate(fake_titles(5))
+        ],
+        comments=[
+            CommentSchema(
+                id=i,
+                date="2024-09-01",
+                text=" ".join(fake_titles(20, seed=i)),
+                subject=SubjectSchema(title=subjects[i % len(subjects)]),
+                source=SourceSchema(title="Telegram", link=f"https://t.me/c/{i}"),
+            )
+            for i in range(comments)
+        ],
+    )
+
+
+def make_app(teacher: TeacherResponse) -> FastAPI:
+    app = FastAPI()
+    body = PrecompressedJSON(teacher.model_dump_json(exclude_none=True).encode())
+
+    @app.get("/legacy", response_model_exclude_none=True)
+    async def legacy() -> TeacherResponse:
+        # The handlers before the fast path: FastAPI validates the dict
+        # against the return type and serializes it once more
+        return teacher.model_dump(exclude_none=True)
+
+    @app.get(
+        "/dumped", response_model=TeacherResponse, response_model_exclude_none=True
+    )
+    async def dumped():
+        return json_response(teacher)
+
+    @app.get(
+        "/cached", response_model=TeacherResponse, response_model_exclude_none=True
+    )
+    async def cached():
+        # /teacher/{iid} serves the bytes kept per data version
+        return body.response(None)
+
+    return app
+
+
+async def run(comments: int) -> None:
+    app = make_app(make_teacher(comments))
+    count = 200
+    rows = [("path", "ms/request", "speedup")]
+    legacy = None
+    for path in ("/legacy", "/dumped", "/cached"):
+        await asgi_throughput(app, path, count // 10)
+        ms = 1000 / await asgi_throughput(app, path, count)
+        legacy = legacy or ms
+        rows.append((path[1:], f"{ms:.3f}", f"x{legacy / ms:.1f}"))
+    report(f"/teacher with {comments} comments, serialization per request", rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000))
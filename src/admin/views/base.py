@@ -1,18 +1,52 @@
-from typing import Any
+from typing import Any, ClassVar
 
 from sqladmin import ModelView
 from starlette.requests import Request
 
 from core.cache import touch_data_version
+from core.database import async_session_maker
+from services.reviews import page_resources
 
 
 class BaseAdminView(ModelView):
     """Базовый класс для всех моделей в SQLAdmin."""
 
+    # Ресурсы, страницы которых тоже меняются (см. page_resources): правка
+    # преподавателя видна на страницах его предметов
+    page_kinds: ClassVar[tuple[str, ...]] = ("teacher",)
+
+    def data_resources(self, model: Any, data: dict[str, Any]) -> set[str]:
+        """Ресурсы (см. core.cache), версии которых меняет эта запись."""
+        return set()
+
+    async def touched_resources(self, model: Any, data: dict[str, Any]) -> set[str]:
+        """Ресурсы записи и страниц, которые их показывают."""
+        async with async_session_maker() as session:
+            return await page_resources(
+                session, self.data_resources(model, data), self.page_kinds
+            )
+
     async def on_model_change(
         self, data: dict[str, Any], model: Any, is_created: bool, request: Request
     ) -> None:
-        touch_data_version()
+        # Ресурсы до изменения: запись могла сменить преподавателя или предмет
+        request.state.data_resources = await self.touched_resources(model, data)
+
+    async def after_model_change(
+        self, data: dict[str, Any], model: Any, is_created: bool, request: Request
+    ) -> None:
+        # Версии меняем после коммита, чтобы не закешировать старые данные заново
+        old = getattr(request.state, "data_resources", set())
+        touch_data_version(*old, *await self.touched_resources(model, data))
 
     async def on_model_delete(self, model: Any, request: Request) -> None:
-        touch_data_version()
+        # После удаления связи записи уже не найти
+        request.state.data_resources = await self.touched_resources(model, {})
+
+    async def after_model_delete(self, model: Any, request: Request) -> None:
+        touch_data_version(*getattr(request.state, "data_resources", set()))
+
+
+def entity_resources(kind: str, *ids: Any) -> set[str]:
+    """Ресурсы вида "teacher:1" для непустых id."""
+    return {f"{kind}:{iid}" for iid in ids if iid not in (None, "")}
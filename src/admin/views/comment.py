@@ -1,6 +1,6 @@
-from typing import ClassVar
+from typing import Any, ClassVar
 
-from admin.views.base import BaseAdminView
+from admin.views.base import BaseAdminView, entity_resources
 from models.reviews import Comment
 
 
@@ -48,3 +48,8 @@ class CommentAdmin(BaseAdminView, model=Comment):
         "subject": {"fields": ("title",)},
         "source": {"fields": ("title",)},
     }
+
+    def data_resources(self, model: Comment, data: dict[str, Any]) -> set[str]:
+        return entity_resources("teacher", model.teacher_id) | entity_resources(
+            "subject", model.subject_id
+        )
@@ -7,7 +7,6 @@ from starlette.background import BackgroundTask
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
 
-from admin.views.base import touch_data_version
 from core.database import async_session_maker
 from enums.reviews import SuggestionStatus
 from models.content import Suggestion
@@ -77,9 +76,6 @@ class DashboardAdmin(BaseView):
                 parser = GSParserService(session)
                 count = await parser.parse()
 
-            if count > 0:
-                touch_data_version()
-
             return RedirectResponse(
                 url=f"/admin/dashboard?parsed={count}",
                 status_code=303,
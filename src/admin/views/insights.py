@@ -1,4 +1,4 @@
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from markupsafe import Markup
 from sqladmin import action
@@ -6,7 +6,8 @@ from starlette.background import BackgroundTask
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
 
-from admin.views.base import BaseAdminView
+from admin.views.base import BaseAdminView, entity_resources
+from core.cache import REGISTRY
 from core.database import async_session_maker
 from enums.insights import ConfidenceScore, RatingScore
 from models.insights import Insights
@@ -76,6 +77,9 @@ class InsightsAdmin(BaseAdminView, model=Insights):
     can_edit = True
     can_delete = True
 
+    def data_resources(self, model: Insights, data: dict[str, Any]) -> set[str]:
+        return {REGISTRY, *entity_resources("teacher", model.id)}
+
     @action(
         name="generate_insights",
         label="Smart Generate Insights",
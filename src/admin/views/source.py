@@ -1,6 +1,6 @@
-from typing import ClassVar
+from typing import Any, ClassVar
 
-from admin.views.base import BaseAdminView
+from admin.views.base import BaseAdminView, entity_resources
 from models.reviews import Source
 
 
@@ -15,3 +15,9 @@ class SourceAdmin(BaseAdminView, model=Source):
     column_sortable_list: ClassVar = [Source.id, Source.title]
 
     form_columns: ClassVar = [Source.title, Source.link]
+
+    # Источник показан в отзывах на страницах преподавателей
+    page_kinds: ClassVar = ("source",)
+
+    def data_resources(self, model: Source, data: dict[str, Any]) -> set[str]:
+        return entity_resources("source", model.id)
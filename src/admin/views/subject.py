@@ -1,9 +1,10 @@
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from sqlalchemy.orm import selectinload
 from starlette.requests import Request
 
-from admin.views.base import BaseAdminView
+from admin.views.base import BaseAdminView, entity_resources
+from core.cache import CATALOG
 from models.reviews import Subject
 
 
@@ -28,6 +29,7 @@ class SubjectAdmin(BaseAdminView, model=Subject):
         return super().list_query(request).options(selectinload(Subject.teachers))
 
     column_searchable_list: ClassVar = [Subject.title]
+    column_details_exclude_list: ClassVar = [Subject.search_title]
 
     column_sortable_list: ClassVar = [
         Subject.id,
@@ -48,3 +50,10 @@ class SubjectAdmin(BaseAdminView, model=Subject):
             "fields": ("name",),
         },
     }
+
+    # Название предмета показано в отзывах на страницах преподавателей
+    page_kinds: ClassVar = ("subject",)
+
+    def data_resources(self, model: Subject, data: dict[str, Any]) -> set[str]:
+        # Список преподавателей входит в страницу предмета, название — в поиск
+        return {CATALOG, *entity_resources("subject", model.id)}
@@ -7,11 +7,12 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
 
-from admin.views.base import BaseAdminView, touch_data_version
+from admin.views.base import BaseAdminView, entity_resources, touch_data_version
 from core.database import async_session_maker
 from enums.reviews import SuggestionStatus
 from models.content import Suggestion
 from models.reviews import Comment, RelationST, Source, Subject, Teacher
+from services.reviews import page_resources
 
 
 class SuggestionAdmin(BaseAdminView, model=Suggestion):
@@ -92,19 +93,15 @@ class SuggestionAdmin(BaseAdminView, model=Suggestion):
     @action(name="mark_rejected", label="Reject", add_in_list=True)
     async def mark_rejected(self, request: Request):
         pks = request.query_params.get("pks", "").split(",")
-        updated = False
+        # Предложения не публикуются, поэтому версии данных не меняются
         async with async_session_maker() as session:
             for pk in pks:
                 if pk:
                     s = await session.get(Suggestion, int(pk))
                     if s and s.status == SuggestionStatus.delayed:
                         s.status = SuggestionStatus.rejected
-                        updated = True
             await session.commit()
 
-        if updated:
-            touch_data_version()
-
         return RedirectResponse(
             url=request.headers.get("referer", "/admin/suggestion/list"),
             status_code=303,
@@ -160,6 +157,7 @@ class SuggestionAdmin(BaseAdminView, model=Suggestion):
         pk = int(request.path_params["pk"])
         form = await request.form()
         action_type = form.get("action_type")
+        resources = set()
 
         async with async_session_maker() as session:
             suggestion = await session.get(Suggestion, pk)
@@ -191,6 +189,10 @@ class SuggestionAdmin(BaseAdminView, model=Suggestion):
                 await session.flush()
 
                 target_subjects = set([subject_id] + sub_ids)
+                # Новый отзыв и связи видны на страницах преподавателя и предметов
+                resources = entity_resources("teacher", teacher_id) | entity_resources(
+                    "subject", *target_subjects
+                )
                 for s_id in target_subjects:
                     if s_id:
                         rel_stmt = (
@@ -211,7 +213,8 @@ class SuggestionAdmin(BaseAdminView, model=Suggestion):
                     suggestion.moderator_isu = moderator_isu
 
             await session.commit()
+            resources = await page_resources(session, resources)
 
-        touch_data_version()
+        touch_data_version(*resources)
 
         return RedirectResponse("/admin/suggestion/list", status_code=303)
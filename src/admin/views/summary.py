@@ -1,6 +1,6 @@
-from typing import ClassVar
+from typing import Any, ClassVar
 
-from admin.views.base import BaseAdminView
+from admin.views.base import BaseAdminView, entity_resources
 from models.reviews import Summary
 
 
@@ -27,3 +27,6 @@ class SummaryAdmin(BaseAdminView, model=Summary):
             "fields": ("name",),
         },
     }
+
+    def data_resources(self, model: Summary, data: dict[str, Any]) -> set[str]:
+        return entity_resources("teacher", model.teacher_id)
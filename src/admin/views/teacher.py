@@ -1,4 +1,4 @@
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from markupsafe import Markup
 from sqladmin import action
@@ -7,7 +7,8 @@ from starlette.background import BackgroundTask
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
 
-from admin.views.base import BaseAdminView
+from admin.views.base import BaseAdminView, entity_resources
+from core.cache import CATALOG, REGISTRY
 from core.database import async_session_maker
 from models.reviews import Teacher
 from services.insights import process_selected_teachers_background
@@ -36,6 +37,7 @@ class TeacherAdmin(BaseAdminView, model=Teacher):
         return super().list_query(request).options(selectinload(Teacher.comments))
 
     column_searchable_list: ClassVar = [Teacher.name]
+    column_details_exclude_list: ClassVar = [Teacher.search_title]
 
     column_sortable_list: ClassVar = [
         Teacher.id,
@@ -67,6 +69,16 @@ class TeacherAdmin(BaseAdminView, model=Teacher):
         },
     }
 
+    def data_resources(self, model: Teacher, data: dict[str, Any]) -> set[str]:
+        # Имя есть в поиске и реестре; предметы, к которым только что
+        # привязали преподавателя, показывают его в списке
+        return {
+            CATALOG,
+            REGISTRY,
+            *entity_resources("teacher", model.id),
+            *entity_resources("subject", *data.get("subjects") or ()),
+        }
+
     @action(
         name="generate_insights",
         label="Smart Generate Insights",
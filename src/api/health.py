@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response, status
+
+from services.reviews import ReviewsService
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/ready")
+async def ready(response: Response) -> dict[str, str]:
+    """Ready once the search and registry caches are loaded"""
+    if not ReviewsService.is_ready():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "loading"}
+    return {"status": "ready"}
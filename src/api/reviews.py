@@ -1,9 +1,13 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
+from core.config import settings
+from core.etag import served_version
+from core.responses import json_response
 from enums.reviews import SearchType
 from schemas.reviews import (
+    CommentsPage,
     RegistryResponse,
     SearchResponse,
     SubjectResponse,
@@ -15,61 +19,105 @@ from services.reviews import ReviewsService, get_reviews_service
 
 router = APIRouter(tags=["Reviews"])
 
+# Keyset pagination of comments: ?after= is the "next" of the previous page
+CommentsLimit = Annotated[int | None, Query(ge=1, le=settings.COMMENTS_PAGE_MAX)]
+# comment.id is an int4, a larger cursor would fail in the database
+CommentsAfter = Annotated[int | None, Query(ge=0, le=2**31 - 1)]
 
-@router.get("/search", response_model_exclude_none=True)
+
+@router.get("/search", response_model=SearchResponse, response_model_exclude_none=True)
 async def search(
     query: Annotated[str, Query(min_length=2)],
+    request: Request,
     strainer: SearchType | None = None,
     service: ReviewsService = Depends(get_reviews_service),
-) -> SearchResponse:
+) -> Response:
     answer = await service.search(query, strainer)
+    served_version(request, service.served_version)
     if answer is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Nothing was found for the query '{query}'",
         )
-    return answer.model_dump(exclude_none=True)
+    return json_response(answer)
 
 
-@router.get("/teacher/{iid}", response_model_exclude_none=True)
+@router.get(
+    "/teacher/{iid}", response_model=TeacherResponse, response_model_exclude_none=True
+)
 async def teacher(
     iid: int,
+    request: Request,
+    limit: CommentsLimit = None,
+    after: CommentsAfter = None,
     service: ReviewsService = Depends(get_reviews_service),
-) -> TeacherResponse:
-    answer = await service.teacher(iid)
-    if answer is None:
+) -> Response:
+    body = await service.teacher_body(iid, limit, after)
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Teacher '{iid}' not found"
         )
-    return answer.model_dump(exclude_none=True)
+    return body.response(request.headers.get("accept-encoding"))
 
 
-@router.get("/subject/{iid}", response_model_exclude_none=True)
+@router.get(
+    "/teacher/{iid}/comments",
+    response_model=CommentsPage,
+    response_model_exclude_none=True,
+)
+async def teacher_comments(
+    iid: int,
+    request: Request,
+    limit: CommentsLimit = None,
+    after: CommentsAfter = None,
+    service: ReviewsService = Depends(get_reviews_service),
+) -> Response:
+    body = await service.comments_body(iid, limit, after)
+    if body is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Teacher '{iid}' not found"
+        )
+    return body.response(request.headers.get("accept-encoding"))
+
+
+@router.get(
+    "/subject/{iid}", response_model=SubjectResponse, response_model_exclude_none=True
+)
 async def subject(
     iid: int,
+    request: Request,
     service: ReviewsService = Depends(get_reviews_service),
-) -> SubjectResponse:
-    answer = await service.subject(iid)
-    if answer is None:
+) -> Response:
+    body = await service.subject_body(iid)
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"Subject '{iid}' not found"
         )
-    return answer.model_dump(exclude_none=True)
+    return body.response(request.headers.get("accept-encoding"))
 
 
-@router.get("/registry", response_model_exclude_none=True)
+@router.get(
+    "/registry", response_model=RegistryResponse, response_model_exclude_none=True
+)
 async def registry(
+    request: Request,
     service: ReviewsService = Depends(get_reviews_service),
-) -> RegistryResponse:
-    answer = await service.registry()
-    return answer.model_dump(exclude_none=True)
+) -> Response:
+    # Pre-serialized bytes, response_model only documents the schema
+    body = await service.registry_body()
+    served_version(request, service.served_version)
+    return body.response(request.headers.get("accept-encoding"))
 
 
-@router.post("/suggestion", status_code=status.HTTP_202_ACCEPTED)
+@router.post(
+    "/suggestion",
+    response_model=SuggestionResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def suggestion(
     body: SuggestionRequest,
     service: ReviewsService = Depends(get_reviews_service),
-) -> SuggestionResponse:
+) -> Response:
 
     if body.teacher.id is None and body.teacher.title is None:
         raise HTTPException(
@@ -88,4 +136,4 @@ async def suggestion(
                 detail='Items in the "subs" field require either an "id" (for existing) or a "title" (for new).',
             )
     answer = await service.add_suggestion(body)
-    return answer
+    return json_response(answer, status.HTTP_202_ACCEPTED)
@@ -1,12 +1,345 @@
+import asyncio
+import json
+import logging
 import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
 
-_DATA_VERSION: int = int(time.time())
+import asyncpg
 
+from core.config import settings
+from core.metrics import (
+    RESPONSE_CACHE_BYTES,
+    RESPONSE_CACHE_ENTRIES,
+    RESPONSE_CACHE_EVICTIONS,
+)
 
-def touch_data_version() -> None:
-    global _DATA_VERSION
-    _DATA_VERSION = int(time.time())
+logger = logging.getLogger(__name__)
 
+# Resources with their own data version, besides "teacher:<id>",
+# "subject:<id>" and "source:<id>". A change of the catalog or registry also
+# touches the changed entities, so the caches reload only those. A touch
+# without any changed entity reloads them in full.
+CATALOG = "catalog"  # teacher names and subject titles, /search
+REGISTRY = "registry"  # teacher names and insights, /registry
+# Start version shared by the workers: "epoch:<release>" of a known
+# release, or "epoch" moved forward by every start without one
+EPOCH = "epoch"
 
-def get_data_version() -> str:
-    return f'"{_DATA_VERSION}"'
+
+class DataVersions:
+    """Versions of individual resources, so a change invalidates only them.
+
+    A touch stamps resources with a new value of the clock, which is at least
+    the wall time in ns and above every version seen, so versions grow across
+    restarts and workers and the version of several resources is simply the
+    largest of theirs. Resources never touched have the ``start`` version.
+    A page is versioned by its own resource only, so every worker computes
+    the same version: a change also touches the pages showing the changed
+    rows, see services.reviews.page_resources().
+    """
+
+    def __init__(self):
+        self.start = time.time_ns()
+        self.clock = self.start
+        self._versions: dict[str, int] = {}
+        # Called with the touched versions, set by VersionBroadcaster
+        self.publish: Callable[[dict[str, int]], None] | None = None
+        # Called after any version moved, here or in another worker
+        self.listeners: list[Callable[[], None]] = []
+
+    def touch(self, *resources: str) -> None:
+        if not resources:
+            return
+        self.clock = max(self.clock + 1, time.time_ns())
+        touched = dict.fromkeys(resources, self.clock)
+        self._versions.update(touched)
+        if self.publish is not None:
+            self.publish(touched)
+        self._notify()
+
+    def apply(self, versions: dict[str, int]) -> None:
+        """Merge versions touched elsewhere; EPOCH moves the start version"""
+        moved = False
+        for resource, version in versions.items():
+            if resource == EPOCH:
+                moved |= version > self.start
+                self.start = max(self.start, version)
+            elif version > self._versions.get(resource, 0):
+                self._versions[resource] = version
+                moved = True
+            self.clock = max(self.clock, version)
+        # A worker also receives the announcements of its own touches
+        if moved:
+            self._notify()
+
+    def adopt(self, start: int) -> None:
+        """Take the start version of the release, set by its first worker"""
+        if start != self.start:
+            self.start = start
+            self.clock = max(self.clock, start)
+            self._notify()
+
+    def _notify(self) -> None:
+        for listener in self.listeners:
+            listener()
+
+    def changed(self, since: int) -> list[str]:
+        """Resources touched after the given version"""
+        return [name for name, version in self._versions.items() if version > since]
+
+    def get(self, resource: str | None = None) -> int:
+        """Version of a resource, the latest one if None"""
+        if resource is None:
+            return self.clock
+        return max(self.start, self._versions.get(resource, 0))
+
+
+data_versions = DataVersions()
+
+
+def touch_data_version(*resources: str) -> None:
+    data_versions.touch(*resources)
+
+
+def get_data_version(resource: str | None = None) -> str:
+    return f'"{data_versions.get(resource)}"'
+
+
+class TTLCache:
+    """LRU mapping whose entries also expire ``ttl`` seconds after insertion"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class ResponseCache:
+    """LRU of serialized responses bounded by their total size in bytes.
+
+    An entry stores the data version it was read at and is served only while
+    the version of its resource has not moved past it.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._data: OrderedDict[Hashable, tuple[Any, int, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, version: int) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[2] < version:
+            self._remove(key)
+            self._report()
+            return None
+        self._data.move_to_end(key)
+        return item[0]
+
+    def set(self, key: Hashable, value: Any, size: int, version: int) -> bool:
+        """Store a value read at ``version``, which must be taken before reading"""
+        if size > self.max_bytes:
+            return False
+        self._remove(key)
+        self._data[key] = (value, size, version)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            self._remove(next(iter(self._data)))
+            RESPONSE_CACHE_EVICTIONS.inc()
+        self._report()
+        return True
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.nbytes = 0
+        self._report()
+
+    def _remove(self, key: Hashable) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.nbytes -= item[1]
+
+    def _report(self) -> None:
+        RESPONSE_CACHE_BYTES.set(self.nbytes)
+        RESPONSE_CACHE_ENTRIES.set(len(self._data))
+
+
+# /teacher/{iid} and /subject/{iid} bodies
+response_cache = ResponseCache(settings.RESPONSE_CACHE_BYTES)
+
+
+class VersionBroadcaster:
+    """Shares data versions between workers and containers through Postgres.
+
+    Touched versions are upserted into the data_version table and announced
+    with NOTIFY in the same transaction. A dedicated connection LISTENs to
+    the channel and applies every announcement, so the other workers see a
+    change as soon as it is committed, without querying on requests. The
+    table serves the versions missed while a worker was (re)connecting.
+    A touch split into several payloads is applied once its last one
+    arrives: a reload in between would count the rest as already loaded.
+    """
+
+    CHANNEL = "data_version"
+    RECONNECT_DELAY = 5.0
+    # NOTIFY payloads are limited to 8000 bytes
+    CHUNK = 100
+
+    def __init__(self, versions: DataVersions, dsn: str, table: str, release: str = ""):
+        self.versions = versions
+        self.dsn = dsn
+        self.table = table
+        self.release = release
+        self.epoch = f"{EPOCH}:{release}" if release else EPOCH
+        self._queue: asyncio.Queue[dict[str, int]] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        # Chunks of a touch received so far, per sending backend
+        self._pending: dict[int, dict[str, int]] = {}
+
+    async def start(self) -> None:
+        """Connect, adopt the epoch and listen in the background.
+
+        The first worker of a release sets its epoch, the others and restarts
+        keep it, so the versions and ETags served so far stay valid. Without
+        a release the responses may have changed, so the epoch moves to this
+        start in every worker.
+        """
+        conn = await self._connect()
+        try:
+            async with conn.transaction():
+                if self.release:
+                    await conn.execute(
+                        f"INSERT INTO {self.table} (resource, version) "
+                        "VALUES ($1, $2) ON CONFLICT (resource) DO NOTHING",
+                        self.epoch,
+                        self.versions.start,
+                    )
+                else:
+                    await self._upsert(conn, {EPOCH: self.versions.start})
+                epoch = await conn.fetchval(
+                    f"SELECT version FROM {self.table} WHERE resource = $1",
+                    self.epoch,
+                )
+                # Versions older than the epoch are covered by it
+                await conn.execute(
+                    f"DELETE FROM {self.table} WHERE version < $1", epoch
+                )
+            self.versions.adopt(epoch)
+            await self._load(conn)
+        except BaseException:
+            await conn.close()
+            raise
+        self.versions.publish = self._queue.put_nowait
+        self._task = asyncio.create_task(self._run(conn))
+
+    async def stop(self) -> None:
+        self.versions.publish = None
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _connect(self) -> asyncpg.Connection:
+        conn = await asyncpg.connect(self.dsn)
+        await conn.add_listener(self.CHANNEL, self._on_notify)
+        return conn
+
+    async def _load(self, conn: asyncpg.Connection) -> None:
+        rows = await conn.fetch(
+            f"SELECT resource, version FROM {self.table} WHERE resource NOT LIKE $1",
+            f"{EPOCH}%",
+        )
+        self.versions.apply({resource: version for resource, version in rows})
+
+    async def _upsert(self, conn: asyncpg.Connection, versions: dict[str, int]):
+        await conn.executemany(
+            f"INSERT INTO {self.table} (resource, version) VALUES ($1, $2) "
+            "ON CONFLICT (resource) DO UPDATE "
+            f"SET version = greatest({self.table}.version, EXCLUDED.version)",
+            list(versions.items()),
+        )
+        items = list(versions.items())
+        for i in range(0, len(items), self.CHUNK):
+            payload = json.dumps(
+                {
+                    "versions": dict(items[i : i + self.CHUNK]),
+                    "last": i + self.CHUNK >= len(items),
+                }
+            )
+            await conn.execute("SELECT pg_notify($1, $2)", self.CHANNEL, payload)
+
+    def _on_notify(self, conn, pid: int, channel: str, payload: str) -> None:
+        message = json.loads(payload)
+        pending = self._pending.setdefault(pid, {})
+        pending.update(message["versions"])
+        if message["last"]:
+            del self._pending[pid]
+            self.versions.apply(pending)
+
+    async def _run(self, conn: asyncpg.Connection | None) -> None:
+        while True:
+            try:
+                if conn is None:
+                    # The table has the touches whose chunks were cut off
+                    self._pending.clear()
+                    conn = await self._connect()
+                    await self._load(conn)
+                await self._publish(conn)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning(f"Data version broadcast failed, reconnecting: {e}")
+            finally:
+                if conn is not None:
+                    conn.terminate()
+                conn = None
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+    async def _publish(self, conn: asyncpg.Connection) -> None:
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _: lost.set())
+        lost_wait = asyncio.create_task(lost.wait())
+        try:
+            while True:
+                get = asyncio.create_task(self._queue.get())
+                await asyncio.wait({get, lost_wait}, return_when="FIRST_COMPLETED")
+                if not get.done():
+                    get.cancel()
+                    raise ConnectionError("connection closed")
+                versions = get.result()
+                try:
+                    async with conn.transaction():
+                        await self._upsert(conn, versions)
+                except BaseException:
+                    # Versions only grow, so a late retry cannot undo anything
+                    self._queue.put_nowait(versions)
+                    raise
+        finally:
+            lost_wait.cancel()
@@ -4,6 +4,8 @@ from pydantic import ConfigDict, field_validator
 from pydantic_settings import BaseSettings
 
 LogLevelStr = Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+SearchBackendStr = Literal["memory", "postgres"]
+TeacherBackendStr = Literal["orm", "postgres"]
 
 
 class Settings(BaseSettings):
@@ -21,6 +23,31 @@ class Settings(BaseSettings):
     PG_USERNAME: str = "admin"
     PG_PASSWORD: str = "admin"
 
+    # memory: every worker scans its own copy of the catalog
+    # postgres: pg_trgm shortlists candidates, only they are ranked in-process
+    SEARCH_BACKEND: SearchBackendStr = "memory"
+    SEARCH_PG_CANDIDATES: int = 100
+    SEARCH_PG_WORD_SIMILARITY: float = 0.3
+    # /search results per (query, strainer, data version), TTL in seconds
+    SEARCH_CACHE_SIZE: int = 1024
+    SEARCH_CACHE_TTL: int = 300
+    # /teacher and /subject bodies, LRU bounded by their size
+    RESPONSE_CACHE_BYTES: int = 64 * 1024 * 1024
+    # While one request reloads the search/registry cache, the others serve
+    # the previous one instead of waiting for it
+    CACHE_STALE_WHILE_REVALIDATE: bool = False
+    # orm: /teacher is loaded as ORM objects and dumped by pydantic
+    # postgres: the JSON document is assembled by one SQL statement
+    TEACHER_BACKEND: TeacherBackendStr = "orm"
+    # Comments on a page of /teacher/{iid}, and the most ?limit= may ask for
+    COMMENTS_PAGE_SIZE: int = 50
+    COMMENTS_PAGE_MAX: int = 200
+    # Responses not precompressed are compressed from this size, in bytes
+    COMPRESS_MIN_SIZE: int = 1024
+    # Code version baked in by the image build (git SHA): the workers and
+    # restarts of one release keep the data versions and ETags
+    RELEASE: str = ""
+
     @field_validator("LOG_LEVEL", mode="before")
     @classmethod
     def uppercase_log_level(cls, value: str) -> str:
@@ -1,30 +1,178 @@
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.cache import CATALOG, REGISTRY, data_versions
+
+# Ключ scope["state"]: версия данных, которые обработчик отдал на самом деле
+SERVED_VERSION = "served_data_version"
+ENTITY_PATH = re.compile(r"/(teacher|subject)/(\d+)(?:/comments)?")
+
+
+def path_resource(path: str) -> str | None:
+    """Ресурс, от версии которого зависит ответ; None — от любых данных"""
+    if path == "/registry":
+        return REGISTRY
+    if path == "/search":
+        return CATALOG
+    if match := ENTITY_PATH.fullmatch(path):
+        return f"{match[1]}:{match[2]}"
+    return None
+
+
+def served_version(request: Request, version: int | None) -> None:
+    """Версия данных ответа, если она может быть старше текущей.
+
+    Так бывает при stale-while-revalidate: снимок ещё не перезагружен.
+    Валидаторы тогда описывают отданные данные, а не текущую версию, иначе
+    клиент сохранил бы старое тело под новым ETag и получал бы 304.
+    """
+    if version is not None:
+        setattr(request.state, SERVED_VERSION, version)
+
+
+def request_header(scope: Scope, name: bytes) -> bytes | None:
+    """Заголовок запроса прямо из scope, без создания Request"""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def entity_tag(version: int, coding: str | None = None) -> str:
+    """Сильный ETag представления: у сжатых вариантов свой суффикс"""
+    return f'"{version}-{coding}"' if coding else f'"{version}"'
 
-from core.cache import get_data_version
 
+def etag_matches(header: str, version: int) -> bool:
+    """If-None-Match по RFC 7232: список тегов, сравнение слабое.
 
-class ETagMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+    W/ и суффикс сжатия отбрасываются: все варианты одной версии
+    семантически одинаковы, клиенту подходит тот, что у него уже есть.
+    """
+    for tag in header.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag.partition("-")[0] == str(version):
+            return True
+    return False
+
+
+# Дата одной версии форматируется один раз, а не на каждый запрос
+@lru_cache(maxsize=1024)
+def last_modified(version: int) -> str:
+    # Версии — время изменения в наносекундах
+    return formatdate(version // 10**9, usegmt=True)
+
+
+def modified_since(header: str, version: int) -> bool:
+    """If-Modified-Since; нераспознанная дата считается изменением"""
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return True
+    if since.tzinfo is None:
+        return True
+    return version // 10**9 > since.timestamp()
+
+
+class ETagMiddleware:
+    """ETag, Last-Modified и 304 для публичных GET-запросов.
+
+    Чистый ASGI: тело ответа идёт дальше без буферизации, меняются только
+    заголовки в сообщении http.response.start.
+    """
+
+    # Заголовки, которые 304 повторяет из полного ответа
+    NOT_MODIFIED_HEADERS = (b"etag", b"last-modified", b"cache-control", b"vary")
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         # Применяем валидацию кеша только к публичным GET-запросам (API)
         # Игнорируем сам интерфейс админки (/admin), чтобы не залочить саму админку
-        if request.method == "GET" and not request.url.path.startswith("/admin"):
-            current_etag = get_data_version()
-            client_etag = request.headers.get("if-none-match")
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or scope["path"].startswith("/admin")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # Версия берётся до обработки запроса: если данные изменятся во время
+        # него, клиент получит старый ETag и просто перезапросит ответ
+        version = data_versions.get(path_resource(scope["path"]))
+        # Общий с обработчиком словарь, даже если scope по пути скопируют
+        state = scope.setdefault("state", {})
 
-            # Если версия у клиента совпадает с серверной — сразу отдаём 304 (0 байт)
-            if client_etag == current_etag:
-                return Response(status_code=304, headers={"ETag": current_etag})
+        # If-Modified-Since учитывается, только если нет If-None-Match
+        any_tag = False
+        if (if_none_match := request_header(scope, b"if-none-match")) is not None:
+            if_none_match = if_none_match.decode("latin-1")
+            # "*" совпадает с любым представлением, если оно есть, поэтому
+            # проверяется по статусу ответа
+            any_tag = if_none_match.strip() == "*"
+            fresh = not any_tag and etag_matches(if_none_match, version)
+        elif (
+            if_modified_since := request_header(scope, b"if-modified-since")
+        ) is not None:
+            fresh = not modified_since(if_modified_since.decode("latin-1"), version)
+        else:
+            fresh = False
 
-            response = await call_next(request)
+        # Если версия у клиента совпадает с серверной — сразу отдаём 304 (0 байт)
+        if fresh:
+            response = Response(
+                status_code=304,
+                headers={
+                    "ETag": entity_tag(version),
+                    "Last-Modified": last_modified(version),
+                    "Cache-Control": "no-cache",
+                    # Как у полного ответа, который зависит от Accept-Encoding
+                    "Vary": "Accept-Encoding",
+                },
+            )
+            await response(scope, receive, send)
+            return
 
-            # Для успешных ответов 200 OK проставляем ETag и Cache-Control
-            if response.status_code == 200:
-                response.headers["ETag"] = current_etag
-                # no-cache заставляет браузер всегда делать валидационный запрос (304),
-                # а не брать данные совсем вслепую без обращения к серверу
-                response.headers["Cache-Control"] = "no-cache"
+        not_modified = False
 
-            return response
+        async def send_with_etag(message: Message):
+            nonlocal not_modified
+            # Для успешных ответов 200 OK проставляем валидаторы и Cache-Control
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                served = min(version, state.get(SERVED_VERSION, version))
+                # Свои валидаторы (хеш содержимого у статики) важнее версии данных
+                if "etag" not in headers:
+                    headers["ETag"] = entity_tag(
+                        served, headers.get("content-encoding")
+                    )
+                    headers["Last-Modified"] = last_modified(served)
+                    # no-cache заставляет браузер всегда делать валидационный запрос (304),
+                    # а не брать данные совсем вслепую без обращения к серверу
+                    headers["Cache-Control"] = "no-cache"
+                if any_tag:
+                    not_modified = True
+                    message = {
+                        "type": "http.response.start",
+                        "status": 304,
+                        "headers": [
+                            (key, value)
+                            for key, value in message["headers"]
+                            if key in self.NOT_MODIFIED_HEADERS
+                        ],
+                    }
+            elif not_modified:
+                # Тело 304 пустое: вместо тела (или pathsend) отправляется
+                # только завершающее сообщение
+                if message.get("more_body", False):
+                    return
+                message = {"type": "http.response.body", "body": b""}
+            await send(message)
 
-        return await call_next(request)
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,27 @@
+from prometheus_client import Counter, Gauge
+
+# The default registry is what Instrumentator.expose() serves on /metrics
+SEARCH_CACHE_REQUESTS = Counter(
+    "reviews_search_cache_requests",
+    "Lookups in the /search result cache",
+    ["result"],
+)
+
+# The hit ratio is rate(hit) / rate(hit + miss) of the requests counter
+RESPONSE_CACHE_REQUESTS = Counter(
+    "reviews_response_cache_requests",
+    "Lookups in the /teacher and /subject response cache",
+    ["kind", "result"],
+)
+RESPONSE_CACHE_EVICTIONS = Counter(
+    "reviews_response_cache_evictions",
+    "Responses evicted to keep the cache within RESPONSE_CACHE_BYTES",
+)
+RESPONSE_CACHE_BYTES = Gauge(
+    "reviews_response_cache_bytes",
+    "Size of the cached response bodies",
+)
+RESPONSE_CACHE_ENTRIES = Gauge(
+    "reviews_response_cache_entries",
+    "Number of cached responses",
+)
@@ -0,0 +1,142 @@
+import gzip
+from functools import partial
+
+import brotli
+from fastapi import Response
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Supported Content-Encodings in order of preference. Bodies are compressed
+# once per data version, so the slower, denser settings pay off
+COMPRESSORS = {
+    "br": partial(brotli.compress, quality=9),
+    "gzip": partial(gzip.compress, compresslevel=9, mtime=0),
+}
+# Bodies compressed per request use fast settings: past them the ratio
+# barely grows while the CPU time does
+DYNAMIC_COMPRESSORS = {
+    "br": partial(brotli.compress, quality=4),
+    "gzip": partial(gzip.compress, compresslevel=6, mtime=0),
+}
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def accepted_encodings(header: str | None) -> tuple[set[str], set[str]]:
+    """Codings of an Accept-Encoding header: accepted ones and those refused
+    with q=0. Codings with an unreadable q are neither"""
+    accepted, refused = set(), set()
+    for part in (header or "").split(","):
+        coding, _, params = part.partition(";")
+        if not (coding := coding.strip().lower()):
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    refused.add(coding)
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    return accepted, refused
+
+
+def preferred_encoding(header: str | None) -> str | None:
+    """Supported coding to answer an Accept-Encoding header with"""
+    accepted, refused = accepted_encodings(header)
+    for coding in COMPRESSORS:
+        # "*" stands for the codings not listed, a refusal still holds
+        if coding in accepted or ("*" in accepted and coding not in refused):
+            return coding
+    return None
+
+
+def json_response(model: BaseModel, status_code: int = 200) -> Response:
+    """Response model dumped once, as bytes.
+
+    FastAPI validates a returned model or dict against the return type and
+    serializes it again; a Response is sent as is. The route keeps
+    response_model for the OpenAPI schema.
+    """
+    return Response(
+        model.model_dump_json(exclude_none=True),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+class PrecompressedJSON:
+    """Serialized JSON body with compressed variants made on first use"""
+
+    media_type = "application/json"
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._variants: dict[str, bytes] = {}
+
+    def encoded(self, coding: str) -> bytes:
+        variant = self._variants.get(coding)
+        if variant is None:
+            variant = self._variants[coding] = COMPRESSORS[coding](self.body)
+        return variant
+
+    def response(self, accept_encoding: str | None) -> Response:
+        headers = {"Vary": "Accept-Encoding"}
+        if coding := preferred_encoding(accept_encoding):
+            headers["Content-Encoding"] = coding
+            body = self.encoded(coding)
+        else:
+            body = self.body
+        return Response(body, media_type=self.media_type, headers=headers)
+
+
+class CompressionMiddleware:
+    """Compresses dynamic responses of at least ``minimum_size`` bytes.
+
+    Responses that already have a Content-Encoding (PrecompressedJSON) and
+    streamed ones (static files) pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = preferred_encoding(Headers(scope=scope).get("accept-encoding"))
+        # The start message waits for the first body chunk, which decides
+        # whether the response is compressed
+        start: Message | None = None
+
+        async def send_compressed(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+            body = message.get("body", b"")
+            if (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                headers.add_vary_header("Accept-Encoding")
+                if coding is not None:
+                    body = DYNAMIC_COMPRESSORS[coding](body)
+                    headers["Content-Encoding"] = coding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
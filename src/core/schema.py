@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import re
+
+from sqlalchemy import Connection, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from core.config import settings
+from core.database import Base
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = ("pg_trgm",)
+# Session advisory lock of the index builds, workers starting together take
+# turns instead of building the same index twice
+INDEX_LOCK = 7_365_110_025
+INDEX_LOCK_POLL = 0.5  # seconds
+CREATE_INDEX = re.compile(r"^CREATE (UNIQUE )?INDEX")
+# Indexes by "schema.name", invalid ones were left by a CREATE INDEX
+# CONCURRENTLY that failed or was interrupted
+EXISTING_INDEXES = text("""
+SELECT n.nspname || '.' || c.relname, i.indisvalid
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+""")
+
+
+async def create_extensions(conn) -> None:
+    for extension in EXTENSIONS:
+        await conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+
+
+async def check_case_folding(conn) -> None:
+    """search_title lowercases with the LC_CTYPE of the database. A C or
+    POSIX ctype leaves Cyrillic as is, the column then keeps no Cyrillic
+    letters and the postgres search backend finds nothing."""
+    if await conn.scalar(text("SELECT lower('ЁЖZ') = 'ёжz'")):
+        return
+    ctype = await conn.scalar(
+        text("SELECT datctype FROM pg_database WHERE datname = current_database()")
+    )
+    message = (
+        f"LC_CTYPE {ctype} of the database does not lowercase Cyrillic, "
+        "search_title will not match normalize(); use a UTF-8 locale"
+    )
+    if settings.SEARCH_BACKEND == "postgres":
+        raise RuntimeError(message)
+    logger.warning(message)
+
+
+def upgrade_schema(conn: Connection) -> None:
+    """Add columns declared after their table was created.
+
+    ``create_all`` only creates missing tables, so existing databases would
+    never get new columns of the models. Indexes are left to create_indexes().
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name, schema=table.schema):
+            continue
+
+        existing = {
+            column["name"]
+            for column in inspector.get_columns(table.name, schema=table.schema)
+        }
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.fullname} ADD COLUMN {ddl}"))
+
+
+async def create_indexes(engine: AsyncEngine) -> None:
+    """Build the indexes of the models missing in the database.
+
+    Existing tables may be large and in use, so every index is built
+    CONCURRENTLY: writes go on meanwhile. That cannot run in a transaction,
+    hence the autocommit connection. An invalid index left by an earlier
+    build that failed is dropped and built again.
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # Not pg_advisory_lock(): a worker blocked in it holds a snapshot, and
+        # the CREATE INDEX CONCURRENTLY of the holder waits for every older
+        # snapshot to go, so both would wait on each other
+        while not await conn.scalar(select(func.pg_try_advisory_lock(INDEX_LOCK))):
+            await asyncio.sleep(INDEX_LOCK_POLL)
+        try:
+            existing = dict((await conn.execute(EXISTING_INDEXES)).all())
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    name = f"{table.schema}.{index.name}"
+                    if existing.get(name):
+                        continue
+                    if name in existing:
+                        logger.warning(f"Rebuilding the invalid index {name}")
+                        await conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY {name}")
+                    else:
+                        logger.info(f"Creating the index {name}")
+                    ddl = CreateIndex(index, if_not_exists=True).compile(
+                        dialect=conn.dialect
+                    )
+                    await conn.exec_driver_sql(
+                        CREATE_INDEX.sub(r"\g<0> CONCURRENTLY", str(ddl), count=1)
+                    )
+        finally:
+            await conn.execute(select(func.pg_advisory_unlock(INDEX_LOCK)))
@@ -0,0 +1,151 @@
+import hashlib
+import logging
+import os
+import re
+from mimetypes import guess_type
+from typing import NamedTuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from core.responses import COMPRESSIBLE_TYPES, COMPRESSORS, preferred_encoding
+
+logger = logging.getLogger(__name__)
+
+# Compressed copies lie next to the originals, as nginx gzip_static expects
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+STATIC_COMPRESSIBLE_TYPES = COMPRESSIBLE_TYPES + (
+    "application/javascript",
+    "application/manifest+json",
+    "application/xml",
+    "image/svg+xml",
+    "image/vnd.microsoft.icon",
+    "image/x-icon",
+)
+# Names carrying a content hash, e.g. app.3f9c2b1a.js, never change content
+FINGERPRINTED = re.compile(r"[.-][0-9a-f]{8,}\.\w+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class StaticAsset(NamedTuple):
+    etag: str  # content hash
+    media_type: str
+    cache_control: str
+    stat: tuple[float, int]  # mtime and size of the hashed original
+    variants: dict[str, tuple[str, os.stat_result]]  # coding → compressed copy
+
+
+def content_etag(data: bytes) -> str:
+    return f'"{hashlib.blake2b(data, digest_size=8).hexdigest()}"'
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles serving compressed copies made once by prepare().
+
+    The copies are files, so FileResponse sends them with pathsend when the
+    server supports it. ETags are content hashes and, unlike the mtime based
+    default, survive a rebuild of the image. Files changed after prepare()
+    are served as plain StaticFiles would.
+    """
+
+    def __init__(self, *args, minimum_size: int = 1024, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.minimum_size = minimum_size
+        self._assets: dict[str, StaticAsset] = {}
+
+    def prepare(self) -> None:
+        """Hash the files and write missing or outdated compressed copies"""
+        assets = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                base, suffix = os.path.splitext(path)
+                if suffix in SUFFIXES.values() and os.path.isfile(base):
+                    continue
+                assets[path] = self._prepare_asset(path)
+        self._assets = assets
+        logger.info(f"Prepared {len(assets)} static files in {self.directory}")
+
+    def _prepare_asset(self, path: str) -> StaticAsset:
+        with open(path, "rb") as file:
+            data = file.read()
+        stat = os.stat(path)
+        media_type = guess_type(path)[0] or "application/octet-stream"
+        cache_control = "no-cache"
+        if FINGERPRINTED.search(os.path.basename(path)):
+            cache_control = IMMUTABLE
+
+        variants = {}
+        if len(data) >= self.minimum_size and media_type.startswith(
+            STATIC_COMPRESSIBLE_TYPES
+        ):
+            for coding, suffix in SUFFIXES.items():
+                try:
+                    variant = self._write_variant(path + suffix, coding, data, stat)
+                except OSError as e:
+                    logger.warning(f"Cannot write a compressed copy of {path}: {e}")
+                    continue
+                # Copies that do not save anything are not worth a Vary
+                if variant.st_size < len(data):
+                    variants[coding] = (path + suffix, variant)
+
+        return StaticAsset(
+            content_etag(data),
+            media_type,
+            cache_control,
+            (stat.st_mtime, stat.st_size),
+            variants,
+        )
+
+    @staticmethod
+    def _write_variant(
+        target: str, coding: str, data: bytes, source: os.stat_result
+    ) -> os.stat_result:
+        try:
+            stat = os.stat(target)
+            if stat.st_mtime >= source.st_mtime:
+                return stat
+        except FileNotFoundError:
+            pass
+        # Workers prepare at the same time: each writes its own temporary
+        # file, the rename is atomic
+        temporary = f"{target}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(COMPRESSORS[coding](data))
+        os.replace(temporary, target)
+        return os.stat(target)
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        asset = self._assets.get(os.fspath(full_path))
+        if asset is None or asset.stat != (stat_result.st_mtime, stat_result.st_size):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        headers = {"ETag": asset.etag, "Cache-Control": asset.cache_control}
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+            coding = preferred_encoding(request_headers.get("accept-encoding"))
+            if coding in asset.variants:
+                full_path, stat_result = asset.variants[coding]
+                headers["Content-Encoding"] = coding
+                # Strong ETag: the bytes differ from the original
+                headers["ETag"] = f'{asset.etag[:-1]}-{coding}"'
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=asset.media_type,
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,3 +1,6 @@
+import asyncio
+import hashlib
+import json
 import logging
 from contextlib import asynccontextmanager
 from importlib import import_module
@@ -5,15 +8,26 @@ from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from prometheus_fastapi_instrumentator import Instrumentator
 from sqlalchemy import text
 
 from admin.setup import seed_initial_admin, setup_admin
+from api.health import router as health_router
 from api.reviews import router as reviews_router
+from core.cache import VersionBroadcaster, data_versions
 from core.config import settings
-from core.database import Base, engine
+from core.database import DATABASE_URL, Base, async_session_maker, engine
 from core.etag import ETagMiddleware
+from core.responses import CompressionMiddleware
+from core.schema import (
+    check_case_folding,
+    create_extensions,
+    create_indexes,
+    upgrade_schema,
+)
+from core.static import PrecompressedStaticFiles
+from models.cache import DataVersion
+from services.warmer import CacheWarmer
 
 logging.basicConfig(
     encoding="utf-8",
@@ -21,9 +35,33 @@ logging.basicConfig(
     format="%(levelname)s:[%(asctime)s]:%(name)s: %(message)s",
 )
 STATIC_DIR = Path(__file__).resolve().parent.parent / "public"
+static_files = PrecompressedStaticFiles(
+    directory=STATIC_DIR, html=True, minimum_size=settings.COMPRESS_MIN_SIZE
+)
 instrumentator = Instrumentator()
 
 
+# Settings that change the response bodies, part of the release
+RESPONSE_SETTINGS = {
+    "SEARCH_BACKEND",
+    "SEARCH_PG_CANDIDATES",
+    "SEARCH_PG_WORD_SIMILARITY",
+    "TEACHER_BACKEND",
+    "COMMENTS_PAGE_SIZE",
+}
+
+
+def data_release() -> str:
+    """Code version and response settings, whose workers and restarts share
+    the data versions and ETags; empty without a code version, so every
+    start begins a new epoch"""
+    if not settings.RELEASE:
+        return ""
+    shaping = json.dumps(settings.model_dump(include=RESPONSE_SETTINGS), sort_keys=True)
+    digest = hashlib.blake2b(shaping.encode(), digest_size=8).hexdigest()
+    return f"{settings.RELEASE}:{digest}"
+
+
 @asynccontextmanager
 async def lifespan(application: FastAPI):
     async with engine.begin() as conn:
@@ -31,15 +69,34 @@ async def lifespan(application: FastAPI):
 
         await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {CONTENT_SCHEMA}"))
         await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {GSPARSER_SCHEMA}"))
+        await create_extensions(conn)
+        await check_case_folding(conn)
         import_module("models")
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+    await create_indexes(engine)
     await seed_initial_admin()
+    await asyncio.to_thread(static_files.prepare)
+    broadcaster = VersionBroadcaster(
+        data_versions,
+        DATABASE_URL.replace("postgresql+asyncpg", "postgresql", 1),
+        DataVersion.__table__.fullname,
+        data_release(),
+    )
+    await broadcaster.start()
+    # /ready turns green once the warmer has loaded the caches
+    warmer = CacheWarmer(async_session_maker)
+    await warmer.start()
     instrumentator.expose(application)
     yield
+    await warmer.stop()
+    await broadcaster.stop()
 
 
 app = FastAPI(lifespan=lifespan)
 
+# Compression is the inner layer, so the ETag follows the Content-Encoding
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESS_MIN_SIZE)
 app.add_middleware(ETagMiddleware)
 app.add_middleware(
     CORSMiddleware,
@@ -53,5 +110,6 @@ app.add_middleware(
 instrumentator.instrument(app)
 admin = setup_admin(app, engine)
 
+app.include_router(health_router)
 app.include_router(reviews_router)
-app.mount("/", StaticFiles(directory=STATIC_DIR, html=True), name="static")
+app.mount("/", static_files, name="static")
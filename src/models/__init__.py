@@ -1,3 +1,4 @@
+from models.cache import DataVersion
 from models.content import (
     Moderator,
     Processed,
@@ -15,6 +16,7 @@ from models.reviews import (
 
 __all__ = [
     "Comment",
+    "DataVersion",
     "Insights",
     "Moderator",
     "Processed",
@@ -0,0 +1,19 @@
+from typing import ClassVar
+
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.database import Base
+
+
+class DataVersion(Base):
+    """Latest data version of a resource, shared by all workers"""
+
+    __tablename__ = "data_version"
+    __table_args__: ClassVar[dict] = {"schema": "public"}
+
+    resource: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger)
+
+    def __str__(self):
+        return f"{self.resource}: {self.version}"
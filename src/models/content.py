@@ -1,6 +1,6 @@
 from typing import ClassVar
 
-from sqlalchemy import Enum, ForeignKey, String
+from sqlalchemy import Enum, ForeignKey, Index, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from core.database import Base
@@ -20,7 +20,16 @@ class Moderator(Base):
 
 class Suggestion(Base):
     __tablename__ = "suggestion"
-    __table_args__: ClassVar[dict] = {"schema": CONTENT_SCHEMA}
+    __table_args__: ClassVar[tuple] = (
+        Index("ix_suggestion_status", "status"),
+        # Deleting a comment cascades to its suggestions
+        Index("ix_suggestion_comment_id", "comment_id"),
+        # The moderation queue: few rows, listed and counted on every visit
+        Index(
+            "ix_suggestion_delayed", "id", postgresql_where=text("status = 'delayed'")
+        ),
+        {"schema": CONTENT_SCHEMA},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     status: Mapped[SuggestionStatus] = mapped_column(
@@ -1,10 +1,38 @@
 from typing import ClassVar
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import Computed, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.database import Base
 from models.insights import Insights
+from services.text import WHITESPACE
+
+
+def normalized(column: str) -> Computed:
+    """Stored services.text.normalize() of a column, for pg_trgm search.
+
+    lower() follows the LC_CTYPE of the database, which must know Cyrillic
+    (see core.schema.check_case_folding).
+    """
+    spaces = "".join(f"\\u{ord(c):04x}" for c in WHITESPACE)
+    return Computed(
+        "btrim(regexp_replace(regexp_replace(regexp_replace(replace("
+        f"translate(lower({column}), E'{spaces}', '{' ' * len(WHITESPACE)}'), "
+        "'ё', 'е'), "
+        "'(.)\\1+', '\\1', 'g'), "
+        "'[^а-яa-z0-9\\s]', '', 'g'), "
+        "'\\s+', ' ', 'g'))",
+        persisted=True,
+    )
+
+
+def trigram_index(table: str) -> Index:
+    return Index(
+        f"ix_{table}_search_title_trgm",
+        "search_title",
+        postgresql_using="gin",
+        postgresql_ops={"search_title": "gin_trgm_ops"},
+    )
 
 
 class Source(Base):
@@ -21,10 +49,11 @@ class Source(Base):
 
 class Subject(Base):
     __tablename__ = "subject"
-    __table_args__: ClassVar[dict] = {"schema": "public"}
+    __table_args__: ClassVar[tuple] = (trigram_index("subject"), {"schema": "public"})
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String)
+    search_title: Mapped[str] = mapped_column(String, normalized("title"))
 
     teachers: Mapped[list["Teacher"]] = relationship(
         "Teacher",
@@ -38,21 +67,23 @@ class Subject(Base):
 
 class Teacher(Base):
     __tablename__ = "teacher"
-    __table_args__: ClassVar[dict] = {"schema": "public"}
+    __table_args__: ClassVar[tuple] = (trigram_index("teacher"), {"schema": "public"})
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String)
+    search_title: Mapped[str] = mapped_column(String, normalized("name"))
 
     subjects: Mapped[list["Subject"]] = relationship(
         "Subject",
         secondary="public.relationst",
         back_populates="teachers",
     )
+    # Ordered, so the pages list them the same way on every load
     summaries: Mapped[list["Summary"]] = relationship(
-        "Summary", back_populates="teacher"
+        "Summary", back_populates="teacher", order_by="Summary.id"
     )
     comments: Mapped[list["Comment"]] = relationship(
-        "Comment", back_populates="teacher"
+        "Comment", back_populates="teacher", order_by="Comment.id"
     )
 
     insight: Mapped["Insights | None"] = relationship(
@@ -65,7 +96,10 @@ class Teacher(Base):
 
 class Summary(Base):
     __tablename__ = "summary"
-    __table_args__: ClassVar[dict] = {"schema": "public"}
+    __table_args__: ClassVar[tuple] = (
+        Index("ix_summary_teacher_id", "teacher_id"),
+        {"schema": "public"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String)
@@ -80,7 +114,11 @@ class Summary(Base):
 
 class RelationST(Base):
     __tablename__ = "relationst"
-    __table_args__: ClassVar[dict] = {"schema": "public"}
+    __table_args__: ClassVar[tuple] = (
+        # The primary key serves subject -> teachers, this teacher -> subjects
+        Index("ix_relationst_teacher_id", "teacher_id"),
+        {"schema": "public"},
+    )
 
     subject_id: Mapped[int] = mapped_column(
         ForeignKey("public.subject.id"), primary_key=True
@@ -92,7 +130,14 @@ class RelationST(Base):
 
 class Comment(Base):
     __tablename__ = "comment"
-    __table_args__: ClassVar[dict] = {"schema": "public"}
+    __table_args__: ClassVar[tuple] = (
+        # Pages of a teacher's comments, WHERE teacher_id = ? AND id > ?,
+        # and any other lookup by teacher_id
+        Index("ix_comment_teacher_id_id", "teacher_id", "id"),
+        Index("ix_comment_subject_id", "subject_id"),
+        Index("ix_comment_source_id", "source_id"),
+        {"schema": "public"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     date: Mapped[str] = mapped_column(String)
@@ -40,7 +40,13 @@ class SummarySchema(BaseModel):
 class TeacherResponse(TeacherSchema):
     insights: Insights | None = None
     summaries: list[SummarySchema]
+    comments: list[CommentSchema]  # the first page
+    next: int | None = None  # ?after= of the next page, absent on the last one
+
+
+class CommentsPage(BaseModel):
     comments: list[CommentSchema]
+    next: int | None = None
 
 
 #  /subject
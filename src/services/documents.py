@@ -0,0 +1,174 @@
+"""Response documents assembled as JSON text by Postgres.
+
+The SQL reproduces pydantic's model_dump_json(exclude_none=True) byte for
+byte: keys in field order, no whitespace, strings escaped by to_json() the
+way pydantic escapes them. concat() skips NULL arguments, so a nullable
+field written as ``',"key":' || value`` drops out together with its key.
+"""
+
+from sqlalchemy import TextClause, text
+
+
+def json_object(*fields: tuple[str, str, bool]) -> str:
+    """SQL of a JSON object from (key, SQL of the JSON value, nullable).
+
+    The first field separates no comma, so it cannot be nullable.
+    """
+    parts = []
+    for position, (key, value, nullable) in enumerate(fields):
+        prefix = ("{" if position == 0 else ",") + f'"{key}":'
+        if nullable:
+            assert position, "the first field of a JSON object must not be null"
+            parts.append(f"'{prefix}' || {value}")
+        else:
+            parts.extend((f"'{prefix}'", value))
+    return f"concat({', '.join(parts)}, '}}')"
+
+
+def json_array(element: str, source: str, order_by: str) -> str:
+    """SQL of a JSON array of ``element`` over the rows of ``source``"""
+    return (
+        f"concat('[', (SELECT string_agg({element}, ',' ORDER BY {order_by}) "
+        f"{source}), ']')"
+    )
+
+
+def json_string(column: str) -> str:
+    return f"to_json({column})::text"
+
+
+def unless_null(column: str, value: str) -> str:
+    """A nested object is never NULL itself, it is when its row is missing"""
+    return f"CASE WHEN {column} IS NOT NULL THEN {value} END"
+
+
+def scored(prefix: str, key: str) -> tuple[str, str, bool]:
+    """A score of the insights, {"value": ..., "reason": ...}"""
+    return (
+        key,
+        json_object(
+            ("value", json_string(f"{prefix}.{key}_value"), False),
+            ("reason", json_string(f"{prefix}.{key}_reason"), False),
+        ),
+        False,
+    )
+
+
+INSIGHTS = json_object(
+    ("summary", json_string("i.summary"), False),
+    ("pros", json_string("i.pros"), False),
+    ("cons", json_string("i.cons"), False),
+    ("highlights", json_string("i.highlights"), False),
+    (
+        "scores",
+        json_object(
+            *(
+                scored("i", key)
+                for key in (
+                    "teaching",
+                    "student_attitude",
+                    "organization",
+                    "grading_fairness",
+                    "strictness",
+                    "workload",
+                    "difficulty",
+                )
+            )
+        ),
+        False,
+    ),
+    scored("i", "rating"),
+    scored("i", "confidence"),
+)
+
+SUMMARY = json_object(
+    ("title", json_string("s.title"), False),
+    ("value", json_string("s.value"), True),
+)
+
+COMMENT = json_object(
+    ("id", "c.id::text", False),
+    ("date", json_string("c.date"), False),
+    ("text", json_string("c.text"), False),
+    (
+        "subject",
+        unless_null("su.id", json_object(("title", json_string("su.title"), False))),
+        True,
+    ),
+    (
+        "source",
+        unless_null(
+            "so.id",
+            json_object(
+                ("title", json_string("so.title"), False),
+                ("link", json_string("so.link"), True),
+            ),
+        ),
+        True,
+    ),
+)
+
+# A page of the comments of teacher :iid after the id :after. "page" reads
+# one row more than "shown" to tell whether another page follows; both walk
+# ix_comment_teacher_id_id
+PAGE = """
+page AS (
+    SELECT * FROM public.comment
+    WHERE teacher_id = :iid AND id > coalesce(:after, -2147483648)
+    ORDER BY id
+    LIMIT :limit + 1
+),
+shown AS (SELECT * FROM page ORDER BY id LIMIT :limit)
+"""
+
+COMMENTS = (
+    "comments",
+    json_array(
+        COMMENT,
+        "FROM shown c "
+        "LEFT JOIN public.subject su ON su.id = c.subject_id "
+        "LEFT JOIN public.source so ON so.id = c.source_id",
+        "c.id",
+    ),
+    False,
+)
+
+NEXT = (
+    "next",
+    (
+        "CASE WHEN (SELECT count(*) FROM page) > :limit "
+        "THEN (SELECT max(id) FROM shown)::text END"
+    ),
+    True,
+)
+
+TEACHER = json_object(
+    ("id", "t.id::text", False),
+    ("name", json_string("t.name"), False),
+    ("insights", f"(SELECT {INSIGHTS} FROM public.insights i WHERE i.id = t.id)", True),
+    (
+        "summaries",
+        json_array(SUMMARY, "FROM public.summary s WHERE s.teacher_id = t.id", "s.id"),
+        False,
+    ),
+    COMMENTS,
+    NEXT,
+)
+
+COMMENTS_PAGE = json_object(COMMENTS, NEXT)
+
+
+def teacher_document(body: str) -> TextClause:
+    """A document of teacher :iid"""
+    return text(f"""
+WITH {PAGE}
+SELECT {body} AS body
+FROM public.teacher t
+WHERE t.id = :iid
+""")
+
+
+# TeacherResponse with the first page of comments, or any page after :after
+TEACHER_DOCUMENT = teacher_document(TEACHER)
+# CommentsPage, /teacher/{iid}/comments
+COMMENTS_DOCUMENT = teacher_document(COMMENTS_PAGE)
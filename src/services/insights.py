@@ -11,12 +11,13 @@ from sqlalchemy import func, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import selectinload
 
-from core.cache import touch_data_version
+from core.cache import REGISTRY, touch_data_version
 from core.config import settings
 from core.database import AsyncSession, get_database
 from models.insights import Insights
 from models.reviews import Comment, Teacher
 from services.prompt import SYSTEM_PROMPT, Evaluation
+from services.reviews import page_resources
 
 logger = logging.getLogger(__name__)
 
@@ -155,6 +156,9 @@ class InsightsService:
             logger.error(f"Database error saving insight for teacher {teacher_id}: {e}")
             raise InsightsDatabaseError(f"Failed to commit insight to DB: {e}") from e
 
+        touch_data_version(
+            *await page_resources(self.session, {f"teacher:{teacher_id}"})
+        )
         return True
 
     async def get_teachers_needing_update(self) -> list[int]:
@@ -195,7 +199,7 @@ async def process_selected_teachers_background(
         await asyncio.sleep(delay)
 
     if processed_count > 0:
-        touch_data_version()
+        touch_data_version(REGISTRY)
 
     logger.info(f"Finished processing insights for {len(teacher_ids)} teachers.")
 
@@ -229,7 +233,7 @@ async def run_bulk_insights_processing(session_factory, delay: float = 4.5):
         await asyncio.sleep(delay)
 
     if processed > 0:
-        touch_data_version()
+        touch_data_version(REGISTRY)
 
     logger.info(f"Bulk processing finished. Processed: {processed}, Errors: {errors}")
 
@@ -1,20 +1,30 @@
-import re
+import asyncio
 import string
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Collection
+from dataclasses import dataclass, field, replace
 from datetime import UTC, datetime, timedelta, timezone
 from typing import ClassVar
 
 from fastapi import Depends
-from rapidfuzz import fuzz
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-
-from core.cache import get_data_version
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import distinct_on
+from sqlalchemy.orm import joinedload, selectinload
+
+from core.cache import (
+    CATALOG,
+    REGISTRY,
+    TTLCache,
+    data_versions,
+    response_cache,
+)
+from core.config import settings
 from core.database import AsyncSession, get_database
+from core.metrics import RESPONSE_CACHE_REQUESTS, SEARCH_CACHE_REQUESTS
+from core.responses import PrecompressedJSON
 from enums.reviews import SearchType, SuggestionStatus
 from models.content import Suggestion
 from models.insights import Insights as InsightsModel
-from models.reviews import Comment, Subject, Teacher
+from models.reviews import Comment, RelationST, Subject, Teacher
 from schemas.insights import (
     Confidence,
     Difficulty,
@@ -32,8 +42,8 @@ from schemas.insights import (
 )
 from schemas.reviews import (
     CommentSchema,
+    CommentsPage,
     RegistryResponse,
-    SearchItem,
     SearchResponse,
     SourceSchema,
     SubjectResponse,
@@ -44,17 +54,24 @@ from schemas.reviews import (
     TeacherResponse,
     TeacherShort,
 )
-
-
-def normalize(text: str) -> str:
-    if not text:
-        return ""
-    text = text.lower()
-    text = text.replace("ё", "е")
-    text = re.sub(r"(.)\1+", r"\1", text)
-    text = re.sub(r"[^а-яa-z0-9\s]", "", text)
-    text = " ".join(text.split())
-    return text
+from services.documents import COMMENTS_DOCUMENT, TEACHER_DOCUMENT
+from services.search import SearchIndex
+from services.text import normalize_query
+
+SEARCH_COLUMNS = {
+    SearchType.teacher: (Teacher, Teacher.name),
+    SearchType.subject: (Subject, Subject.title),
+}
+
+# Pages showing a resource: (page kind, resource id column, page id column)
+PAGES_SHOWING = {
+    # A subject page lists its teachers with insights and latest comments
+    "teacher": ("subject", RelationST.teacher_id, RelationST.subject_id),
+    # A teacher page shows the subject and source titles of its comments,
+    # expanded only when the subject or source row itself changes
+    "subject": ("teacher", Comment.subject_id, Comment.teacher_id),
+    "source": ("teacher", Comment.source_id, Comment.teacher_id),
+}
 
 
 def review_section(text: str) -> str:
@@ -66,144 +83,471 @@ def review_section(text: str) -> str:
     return " ".join(selected) + "..."
 
 
+async def page_resources(
+    session: AsyncSession, resources: set[str], kinds: Collection[str] = ("teacher",)
+) -> set[str]:
+    """The resources with the pages showing them, to touch on a change.
+
+    Pages are versioned by their own resource only, so the dependencies are
+    read from the tables by the writer rather than kept in each worker. Only
+    the resources of the given kinds are expanded: a new comment touches its
+    subject page, not every teacher page showing the subject title.
+    """
+    ids: dict[str, set[int]] = {}
+    for resource in resources:
+        kind, _, iid = resource.partition(":")
+        if kind in kinds and iid.isdigit():
+            ids.setdefault(kind, set()).add(int(iid))
+
+    pages = set(resources)
+    for kind, kind_ids in ids.items():
+        page, column, page_column = PAGES_SHOWING[kind]
+        page_ids = await session.scalars(
+            select(page_column).where(column.in_(kind_ids)).distinct()
+        )
+        pages.update(f"{page}:{i}" for i in page_ids)
+    return pages
+
+
 def get_current_time():
     utc_plus_3 = timezone(timedelta(hours=3))
     current_time = datetime.now(UTC).astimezone(utc_plus_3)
     return current_time.strftime("%H:%M %d.%m.%Y")
 
 
+@dataclass(frozen=True, slots=True)
+class CacheSnapshot:
+    """Search and registry caches of a worker, swapped as a whole.
+
+    Nothing in a published snapshot is mutated: a reload builds the parts
+    it changes off to the side and replaces ReviewsService._snapshot with
+    one assignment, so a request reads all of them from one version. The
+    versions are the data version (the clock) the part was loaded at, it
+    is reloaded once its resource is touched after that.
+    """
+
+    catalog_version: int | None = None
+    search_index: SearchIndex | None = None
+    registry_version: int | None = None
+    registry: RegistryResponse | None = None
+    registry_names: dict[int, str] = field(default_factory=dict)  # id -> name
+    registry_body: PrecompressedJSON | None = None
+
+    def loaded_version(self, part: str) -> int | None:
+        return self.catalog_version if part == CATALOG else self.registry_version
+
+
 class ReviewsService:
-    # static cache variables
-    _version = None
-    _teachers_cache: ClassVar[list[dict]] = []
-    _subjects_cache: ClassVar[list[dict]] = []
-    _registry: ClassVar[RegistryResponse] = None
+    # Above this many changed entities one full reload is cheaper than a delta
+    DELTA_LIMIT = 1000
+
+    _snapshot: ClassVar[CacheSnapshot] = CacheSnapshot()
+    _search_cache: ClassVar[TTLCache] = TTLCache(
+        settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL
+    )
+    # part -> reload in progress, resolved when it ends either way
+    _reloads: ClassVar[dict[str, asyncio.Future]] = {}
 
     def __init__(self, session: AsyncSession):
         self.session = session
+        # Data version of the snapshot the last call answered from, which
+        # stale-while-revalidate may leave behind the current one
+        self.served_version: int | None = None
+
+    async def reload_cache(self, *parts: str):
+        """Loading the search and registry cache
+
+        parts: CATALOG and/or REGISTRY, both by default. Each one is reloaded
+        only when its own data version changed, and only the teachers and
+        subjects touched since it was loaded are fetched.
+        """
+
+        parts = parts or (CATALOG, REGISTRY)
 
-    async def reload_cache(self):
-        """Loading the search and registry cache"""
+        # /search (the postgres backend keeps the catalog in the database)
+        if CATALOG in parts and settings.SEARCH_BACKEND == "memory":
+            await self._single_flight(CATALOG, self._reload_catalog)
 
-        current = get_data_version()
-        if ReviewsService._version == current:
+        # /registry
+        if REGISTRY in parts:
+            await self._single_flight(REGISTRY, self._reload_registry)
+
+    @staticmethod
+    def is_ready() -> bool:
+        """Every cached part has been loaded at least once"""
+        snapshot = ReviewsService._snapshot
+        if snapshot.registry is None:
+            return False
+        return settings.SEARCH_BACKEND != "memory" or snapshot.search_index is not None
+
+    @staticmethod
+    def _is_fresh(part: str) -> bool:
+        loaded = ReviewsService._snapshot.loaded_version(part)
+        return loaded is not None and data_versions.get(part) <= loaded
+
+    async def _single_flight(self, part: str, reload) -> None:
+        """Reload a stale part once per worker, however many requests need it.
+
+        The first request reloads, the others wait for it and check again,
+        taking over if it failed. With CACHE_STALE_WHILE_REVALIDATE they
+        return at once when a previous version is loaded.
+        """
+        while not self._is_fresh(part):
+            flight = ReviewsService._reloads.get(part)
+            if flight is None:
+                break
+            if (
+                settings.CACHE_STALE_WHILE_REVALIDATE
+                and ReviewsService._snapshot.loaded_version(part) is not None
+            ):
+                return
+            # A cancelled waiter must not cancel the reload of the others
+            await asyncio.shield(flight)
+        else:
             return
 
-        # /search
+        flight = asyncio.get_running_loop().create_future()
+        ReviewsService._reloads[part] = flight
+        try:
+            await reload()
+        finally:
+            del ReviewsService._reloads[part]
+            flight.set_result(None)
+
+    @classmethod
+    def _changes(cls, loaded: int | None, kinds: tuple[str, ...]) -> dict | None:
+        """Ids per kind touched after the loaded version, None for a full load"""
+        # A new epoch may hide changes that are no longer in the versions
+        if loaded is None or loaded < data_versions.start:
+            return None
+        changes = {kind: set() for kind in kinds}
+        for name in data_versions.changed(loaded):
+            kind, _, iid = name.partition(":")
+            if kind in changes and iid.isdigit():
+                changes[kind].add(int(iid))
+        count = sum(map(len, changes.values()))
+        if not count or count > cls.DELTA_LIMIT:
+            return None
+        return changes
+
+    async def _reload_catalog(self):
+        base = ReviewsService._snapshot
+        version = data_versions.get()
+
+        changes = None
+        if base.search_index is not None:
+            changes = self._changes(base.catalog_version, tuple(SEARCH_COLUMNS))
+        if changes is None:
+            teachers = await self._catalog_rows(SearchType.teacher)
+            subjects = await self._catalog_rows(SearchType.subject)
+            # Seconds of CPU for a large catalog, the loop keeps serving
+            index = await asyncio.to_thread(SearchIndex, teachers, subjects)
+        else:
+            index = base.search_index
+            for cat, ids in changes.items():
+                if not ids:
+                    continue
+                rows = await self._catalog_rows(cat, ids)
+                # Tens of ms for a large catalog; the copy is not shared yet
+                index = await asyncio.to_thread(
+                    index.updated, cat, rows, ids - {row["id"] for row in rows}
+                )
 
-        teachers_stmt = select(Teacher.id, Teacher.name)
-        teachers_res = await self.session.execute(teachers_stmt)
-        ReviewsService._teachers_cache = [
-            {"title": name, "id": t_id} for t_id, name in teachers_res.all()
-        ]
+        # The registry may have been swapped meanwhile, keep its version
+        ReviewsService._snapshot = replace(
+            ReviewsService._snapshot, catalog_version=version, search_index=index
+        )
 
-        subjects_stmt = select(Subject.id, Subject.title)
-        subjects_res = await self.session.execute(subjects_stmt)
-        ReviewsService._subjects_cache = [
-            {"title": title, "id": s_id} for s_id, title in subjects_res.all()
-        ]
+    async def _catalog_rows(
+        self, cat: SearchType, ids: set[int] | None = None
+    ) -> list[dict]:
+        model, title = SEARCH_COLUMNS[cat]
+        stmt = select(model.id, title)
+        if ids is not None:
+            stmt = stmt.where(model.id.in_(ids))
+        result = await self.session.execute(stmt)
+        return [{"title": t, "id": i} for i, t in result.all()]
 
-        # /registry
+    async def _reload_registry(self):
+        base = ReviewsService._snapshot
+        version = data_versions.get()
 
         stmt = select(InsightsModel).options(selectinload(InsightsModel.teacher))
+        changes = None
+        if base.registry is not None:
+            changes = self._changes(base.registry_version, (SearchType.teacher,))
+        if changes is None:
+            original, normalized, insights, names = {}, {}, {}, {}
+            ids = set()
+        else:
+            original = dict(base.registry.original)
+            normalized = dict(base.registry.normalized)
+            insights = dict(base.registry.insights)
+            names = dict(base.registry_names)
+            ids = changes[SearchType.teacher]
+            stmt = stmt.where(InsightsModel.id.in_(ids))
+
         results = await self.session.execute(stmt)
-        original = {}
-        normalized = {}
-        insights = {}
+        loaded = {}
         for ins in results.scalars():
-            if ins.teacher is None:
+            if ins.teacher is not None:
+                loaded[ins.teacher.id] = ins
+
+        for iid in ids:
+            name = names.pop(iid, None)
+            if name is None:
                 continue
-            id, name = ins.teacher.id, ins.teacher.name
-            original[name] = id
-            normalized["".join(name.split()).lower()] = id
-            insights[id] = InsightsEssential(
+            # Another teacher may carry the same name
+            if original.get(name) == iid:
+                del original[name]
+            key = self._registry_key(name)
+            if normalized.get(key) == iid:
+                del normalized[key]
+            insights.pop(iid, None)
+        for iid, ins in loaded.items():
+            name = ins.teacher.name
+            names[iid] = name
+            original[name] = iid
+            normalized[self._registry_key(name)] = iid
+            insights[iid] = InsightsEssential(
                 rating_value=ins.rating_value, confidence_value=ins.confidence_value
             )
-        ReviewsService._registry = RegistryResponse(
-            original=original,
-            normalized=normalized,
-            insights=insights,
+
+        registry = RegistryResponse(
+            original=original, normalized=normalized, insights=insights
+        )
+        # The body is the one part still built from the whole registry
+        body = PrecompressedJSON(registry.model_dump_json(exclude_none=True).encode())
+        ReviewsService._snapshot = replace(
+            ReviewsService._snapshot,
+            registry_version=version,
+            registry=registry,
+            registry_names=names,
+            registry_body=body,
         )
 
-        ReviewsService._version = current
+    @staticmethod
+    def _registry_key(name: str) -> str:
+        return "".join(name.split()).lower()
 
     async def registry(self) -> RegistryResponse:
-        await self.reload_cache()
-        return ReviewsService._registry
+        await self.reload_cache(REGISTRY)
+        snapshot = ReviewsService._snapshot
+        self.served_version = snapshot.registry_version
+        return snapshot.registry
+
+    async def registry_body(self) -> PrecompressedJSON:
+        """/registry serialized once per data version"""
+        await self.reload_cache(REGISTRY)
+        snapshot = ReviewsService._snapshot
+        self.served_version = snapshot.registry_version
+        return snapshot.registry_body
 
     async def search(self, query: str, strainer: str | None) -> SearchResponse:
-        await self.reload_cache()
+        if settings.SEARCH_BACKEND == "memory":
+            await self.reload_cache(CATALOG)
+        snapshot = ReviewsService._snapshot
 
-        normalized_query = normalize(query)
+        normalized_query = normalize_query(query)
         if not normalized_query:
             return SearchResponse(results=[])
 
-        cache = {
-            SearchType.teacher: ReviewsService._teachers_cache,
-            SearchType.subject: ReviewsService._subjects_cache,
-        }
+        # A catalog change makes every older key unreachable. The in-memory
+        # catalog may lag behind the data version, the key follows the index
+        if settings.SEARCH_BACKEND == "memory":
+            version = self.served_version = snapshot.catalog_version
+        else:
+            version = data_versions.get(CATALOG)
+        key = (normalized_query, strainer, version)
+        cached = ReviewsService._search_cache.get(key)
+        if cached is not None:
+            SEARCH_CACHE_REQUESTS.labels(result="hit").inc()
+            return cached
+        SEARCH_CACHE_REQUESTS.labels(result="miss").inc()
 
         categories = (
             [strainer] if strainer else [SearchType.teacher, SearchType.subject]
         )
-        raw_results = []
+        if settings.SEARCH_BACKEND == "postgres":
+            index = await self.search_candidates(normalized_query, categories)
+        else:
+            index = snapshot.search_index
+        response = SearchResponse(results=index.search(normalized_query, categories))
+        ReviewsService._search_cache.set(key, response)
+        return response
+
+    async def search_candidates(
+        self, normalized_query: str, categories: list[SearchType]
+    ) -> SearchIndex:
+        """Shortlist titles with pg_trgm indexes and index only them"""
+        await self.session.execute(
+            select(
+                func.set_config(
+                    "pg_trgm.word_similarity_threshold",
+                    str(settings.SEARCH_PG_WORD_SIMILARITY),
+                    True,
+                )
+            )
+        )
 
+        rows = {}
         for cat in categories:
-            data_source = cache.get(cat, [])
-            for item in data_source:
-                original_title = item["title"]
-                target_text = normalize(original_title)
-
-                score = 0
-                priority = 3
-
-                if normalized_query in target_text:
-                    score = 100
-                    priority = 1 if target_text.startswith(normalized_query) else 2
-                else:
-                    score = fuzz.partial_ratio(normalized_query, target_text)
-                    priority = 3
-
-                threshold = 75 if priority < 3 else 85
-
-                if score >= threshold:
-                    raw_results.append(
-                        {
-                            "id": item["id"],
-                            "title": original_title,
-                            "type": cat,
-                            "score": score,
-                            "priority": priority,
-                        }
-                    )
+            model, title = SEARCH_COLUMNS[cat]
+            starts = model.search_title.startswith(normalized_query, autoescape=True)
+            contains = model.search_title.contains(normalized_query, autoescape=True)
+            stmt = (
+                select(model.id, title)
+                # search_title %> query is word_similarity(query, search_title)
+                # above the threshold, served by the GIN trigram index
+                .where(contains | model.search_title.op("%>")(normalized_query))
+                .order_by(
+                    starts.desc(),
+                    contains.desc(),
+                    func.word_similarity(normalized_query, model.search_title).desc(),
+                    func.split_part(func.btrim(title), " ", 1).collate("C"),
+                    model.id,
+                )
+                .limit(settings.SEARCH_PG_CANDIDATES)
+            )
+            result = await self.session.execute(stmt)
+            rows[cat] = [{"title": t, "id": i} for i, t in result.all()]
 
-        raw_results.sort(
-            key=lambda x: (x["priority"], -x["score"], x["title"].split()[0])
+        return SearchIndex(
+            rows.get(SearchType.teacher, []), rows.get(SearchType.subject, [])
         )
 
-        return SearchResponse(
-            results=[
-                SearchItem(id=res["id"], title=res["title"], type=res["type"])
-                for res in raw_results[:20]
-            ]
+    async def teacher(
+        self, iid: int, limit: int | None = None, after: int | None = None
+    ) -> TeacherResponse | None:
+        t = await self._load_teacher(iid)
+        if not t:
+            return None
+        comments, next_after = await self._load_comments(
+            iid, limit or settings.COMMENTS_PAGE_SIZE, after
+        )
+        return self._teacher_response(t, comments, next_after)
+
+    async def teacher_body(
+        self, iid: int, limit: int | None = None, after: int | None = None
+    ) -> PrecompressedJSON | None:
+        """/teacher/{iid} serialized once per version of the teacher and page"""
+        if settings.TEACHER_BACKEND == "postgres":
+            load = self._teacher_document
+        else:
+            load = self._teacher_orm_document
+        return await self._teacher_body("teacher", iid, limit, after, load)
+
+    async def comments_body(
+        self, iid: int, limit: int | None = None, after: int | None = None
+    ) -> PrecompressedJSON | None:
+        """/teacher/{iid}/comments, cached like the teacher pages"""
+        if settings.TEACHER_BACKEND == "postgres":
+            load = self._comments_document
+        else:
+            load = self._comments_orm_document
+        return await self._teacher_body("comments", iid, limit, after, load)
+
+    async def _teacher_body(
+        self, kind: str, iid: int, limit: int | None, after: int | None, load
+    ) -> PrecompressedJSON | None:
+        limit = limit or settings.COMMENTS_PAGE_SIZE
+        key, resource = (kind, iid, limit, after), f"teacher:{iid}"
+        body = response_cache.get(key, data_versions.get(resource))
+        RESPONSE_CACHE_REQUESTS.labels(
+            kind=kind, result="miss" if body is None else "hit"
+        ).inc()
+        if body is not None:
+            return body
+
+        version = data_versions.get()
+        content = await load(iid, limit, after)
+        if content is None:
+            return None
+        body = PrecompressedJSON(content)
+        response_cache.set(key, body, len(body.body), version)
+        return body
+
+    async def _teacher_orm_document(
+        self, iid: int, limit: int, after: int | None
+    ) -> bytes | None:
+        """Serialized teacher with a page of comments"""
+        t = await self._load_teacher(iid)
+        if not t:
+            return None
+        comments, next_after = await self._load_comments(iid, limit, after)
+        return self._serialized(self._teacher_response(t, comments, next_after))
+
+    async def _comments_orm_document(
+        self, iid: int, limit: int, after: int | None
+    ) -> bytes | None:
+        if (
+            await self.session.scalar(select(Teacher.id).where(Teacher.id == iid))
+            is None
+        ):
+            return None
+        comments, next_after = await self._load_comments(iid, limit, after)
+        page = CommentsPage(
+            comments=[self._comment_schema(c) for c in comments], next=next_after
         )
+        return self._serialized(page)
+
+    @staticmethod
+    def _serialized(response: TeacherResponse | CommentsPage) -> bytes:
+        return response.model_dump_json(exclude_none=True).encode()
+
+    async def _teacher_document(
+        self, iid: int, limit: int, after: int | None
+    ) -> bytes | None:
+        """The same document built by Postgres in one statement, no ORM objects"""
+        return await self._sql_document(TEACHER_DOCUMENT, iid, limit, after)
+
+    async def _comments_document(
+        self, iid: int, limit: int, after: int | None
+    ) -> bytes | None:
+        return await self._sql_document(COMMENTS_DOCUMENT, iid, limit, after)
+
+    async def _sql_document(
+        self, statement, iid: int, limit: int, after: int | None
+    ) -> bytes | None:
+        params = {"iid": iid, "limit": limit, "after": after}
+        body = await self.session.scalar(statement, params)
+        if body is None:
+            return None
+        return body.encode()
 
-    async def teacher(self, iid: int) -> TeacherResponse | None:
+    async def _load_teacher(self, iid: int) -> Teacher | None:
         stmt = (
             select(Teacher)
-            .options(
-                selectinload(Teacher.insight),
-                selectinload(Teacher.summaries),
-                selectinload(Teacher.comments).joinedload(Comment.source),
-                selectinload(Teacher.comments).joinedload(Comment.subject),
-            )
+            .options(selectinload(Teacher.insight), selectinload(Teacher.summaries))
             .where(Teacher.id == iid)
         )
 
-        t = await self.session.scalar(stmt)
-        if not t:
-            return None
+        return await self.session.scalar(stmt)
 
+    async def _load_comments(
+        self, iid: int, limit: int, after: int | None
+    ) -> tuple[list[Comment], int | None]:
+        """Up to ``limit`` comments with ids above ``after`` (keyset pagination),
+        and the ``after`` of the next page, None on the last one"""
+        stmt = (
+            select(Comment)
+            .options(joinedload(Comment.source), joinedload(Comment.subject))
+            .where(Comment.teacher_id == iid)
+            .order_by(Comment.id)
+            # One more row tells whether another page follows
+            .limit(limit + 1)
+        )
+        if after is not None:
+            stmt = stmt.where(Comment.id > after)
+        comments = list((await self.session.scalars(stmt)).all())
+        if len(comments) > limit:
+            return comments[:limit], comments[limit - 1].id
+        return comments, None
+
+    @staticmethod
+    def _teacher_response(
+        t: Teacher, comments: list[Comment], next_after: int | None
+    ) -> TeacherResponse:
         insights = None
         if t.insight:
             i = t.insight
@@ -245,34 +589,77 @@ class ReviewsService:
                 SummarySchema(title=summ.title, value=summ.value)
                 for summ in t.summaries
             ],
-            comments=[
-                CommentSchema(
-                    id=c.id,
-                    date=c.date,
-                    text=c.text,
-                    source=SourceSchema(title=c.source.title, link=c.source.link)
-                    if c.source
-                    else None,
-                    subject=SubjectSchema(title=c.subject.title) if c.subject else None,
-                )
-                for c in t.comments
-            ],
+            comments=[ReviewsService._comment_schema(c) for c in comments],
+            next=next_after,
+        )
+
+    @staticmethod
+    def _comment_schema(c: Comment) -> CommentSchema:
+        return CommentSchema(
+            id=c.id,
+            date=c.date,
+            text=c.text,
+            source=SourceSchema(title=c.source.title, link=c.source.link)
+            if c.source
+            else None,
+            subject=SubjectSchema(title=c.subject.title) if c.subject else None,
         )
 
     async def subject(self, iid: int) -> SubjectResponse | None:
+        s = await self._load_subject(iid)
+        if not s:
+            return None
+        return self._subject_response(s, await self._teacher_alts(s.teachers))
+
+    async def subject_body(self, iid: int) -> PrecompressedJSON | None:
+        """/subject/{iid} serialized once per version of the subject"""
+        key, resource = ("subject", iid), f"subject:{iid}"
+        body = response_cache.get(key, data_versions.get(resource))
+        RESPONSE_CACHE_REQUESTS.labels(
+            kind="subject", result="miss" if body is None else "hit"
+        ).inc()
+        if body is not None:
+            return body
+
+        version = data_versions.get()
+        s = await self._load_subject(iid)
+        if not s:
+            return None
+        alts = await self._teacher_alts(s.teachers)
+        body = PrecompressedJSON(
+            self._subject_response(s, alts).model_dump_json(exclude_none=True).encode()
+        )
+        response_cache.set(key, body, len(body.body), version)
+        return body
+
+    async def _load_subject(self, iid: int) -> Subject | None:
         stmt = (
             select(Subject)
-            .options(
-                selectinload(Subject.teachers).selectinload(Teacher.insight),
-                selectinload(Subject.teachers).selectinload(Teacher.comments),
-            )
+            .options(selectinload(Subject.teachers).selectinload(Teacher.insight))
             .where(Subject.id == iid)
         )
 
-        s = await self.session.scalar(stmt)
-        if not s:
-            return None
+        return await self.session.scalar(stmt)
+
+    async def _teacher_alts(self, teachers: list[Teacher]) -> dict[int, str]:
+        """review_section() of the latest comment of each teacher.
+
+        DISTINCT ON reads one comment per teacher instead of loading every
+        comment of every teacher of the subject.
+        """
+        if not teachers:
+            return {}
+        stmt = (
+            select(Comment.teacher_id, Comment.text)
+            .where(Comment.teacher_id.in_([t.id for t in teachers]))
+            .ext(distinct_on(Comment.teacher_id))
+            .order_by(Comment.teacher_id, Comment.id.desc())
+        )
+        result = await self.session.execute(stmt)
+        return {iid: review_section(text) for iid, text in result.all()}
 
+    @staticmethod
+    def _subject_response(s: Subject, alts: dict[int, str]) -> SubjectResponse:
         return SubjectResponse(
             id=s.id,
             title=s.title,
@@ -280,7 +667,7 @@ class ReviewsService:
                 TeacherShort(
                     id=t.id,
                     name=t.name,
-                    alt=review_section(t.comments[-1].text) if t.comments else None,
+                    alt=alts.get(t.id),
                     insights=InsightsShort(
                         summary=t.insight.summary,
                         pros=t.insight.pros,
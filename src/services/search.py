@@ -0,0 +1,354 @@
+import copy
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from rapidfuzz import fuzz, process
+
+from enums.reviews import SearchType
+from schemas.reviews import SearchItem
+from services.text import normalize
+
+
+def ngrams(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(len(text) - size + 1)]
+
+
+def first_word(title: str) -> str:
+    """Tie-breaker for equally scored results"""
+    words = title.split(None, 1)
+    return words[0] if words else ""
+
+
+class Shortlist(NamedTuple):
+    candidates: list[int]  # texts that can reach score_cutoff
+    complete: list[int]  # candidates containing every n-gram of the query
+
+
+class NgramIndex:
+    """Inverted index of character n-grams shortlisting partial_ratio candidates.
+
+    If partial_ratio(a, b) >= cutoff, the shorter string (length m) can be
+    turned into a window of the longer one with at most D indel edits, where
+    D = floor((100 - cutoff) / 100 * 2m). Every edit destroys at most ``size``
+    n-grams, so at least m - size + 1 - size * D of its n-grams occur in the
+    other string. Texts below that bound cannot reach the cutoff, which makes
+    the shortlist exact. Bigrams are used because for trigrams the bound is
+    not positive for names of a few letters.
+    """
+
+    SIZE = 2
+
+    def __init__(self, texts: Iterable[str], score_cutoff: int):
+        self.texts = list(texts)
+        self.score_cutoff = score_cutoff
+
+        # Positions are kept in arrays of C ints: 4 bytes instead of a
+        # pointer plus an int object per entry
+        postings = defaultdict(list)
+        required = array("i")
+        for idx, text in enumerate(self.texts):
+            grams = Counter(ngrams(text, self.SIZE))
+            for gram in grams:
+                postings[gram].append(idx)
+            required.append(self._min_required(text, grams))
+        self._postings = {gram: array("i", idxs) for gram, idxs in postings.items()}
+        # n-grams whose posting lists are shared with the index copied from
+        self._shared: set[str] = set()
+        self._required = required
+
+        lengths = [len(text) for text in self.texts]
+        self._by_length = array(
+            "i", sorted(range(len(lengths)), key=lengths.__getitem__)
+        )
+        self._lengths = array("i", (lengths[idx] for idx in self._by_length))
+
+    def _min_required(self, text: str, grams: Counter) -> int:
+        # When the text is the shorter side, the query n-grams it shares
+        # cover distinct n-grams of the text, each repeated at most
+        # max(grams.values()) times in it
+        return -(-self.min_shared(len(text)) // max(grams.values(), default=1))
+
+    def copy(self) -> "NgramIndex":
+        """Copy to patch, sharing posting lists until they are changed"""
+        clone = copy.copy(self)
+        clone.texts = self.texts.copy()
+        clone._postings = self._postings.copy()
+        clone._shared = set(self._postings)
+        clone._required = self._required[:]
+        clone._by_length = self._by_length[:]
+        clone._lengths = self._lengths[:]
+        return clone
+
+    def set(self, idx: int, text: str) -> None:
+        """Replace the text at idx, or append it if idx == len(texts)"""
+        if idx == len(self.texts):
+            self.texts.append(text)
+            self._required.append(0)
+        else:
+            self._unlink(idx)
+            self.texts[idx] = text
+        self._link(idx)
+
+    def delete(self, idx: int) -> None:
+        """Remove the text at idx, moving the last text into its place"""
+        last = len(self.texts) - 1
+        self._unlink(idx)
+        if idx != last:
+            self._unlink(last)
+            self.texts[idx] = self.texts[last]
+            self._link(idx)
+        self.texts.pop()
+        self._required.pop()
+
+    def _link(self, idx: int) -> None:
+        text = self.texts[idx]
+        grams = Counter(ngrams(text, self.SIZE))
+        for gram in grams:
+            self._writable(gram).append(idx)
+        self._required[idx] = self._min_required(text, grams)
+        pos = bisect_right(self._lengths, len(text))
+        self._lengths.insert(pos, len(text))
+        self._by_length.insert(pos, idx)
+
+    def _writable(self, gram: str) -> array:
+        if gram in self._shared:
+            self._shared.discard(gram)
+            self._postings[gram] = self._postings[gram][:]
+        return self._postings.setdefault(gram, array("i"))
+
+    def _unlink(self, idx: int) -> None:
+        text = self.texts[idx]
+        for gram in set(ngrams(text, self.SIZE)):
+            postings = self._writable(gram)
+            postings.remove(idx)
+            if not postings:
+                del self._postings[gram]
+        pos = self._by_length.index(idx, bisect_left(self._lengths, len(text)))
+        del self._lengths[pos]
+        del self._by_length[pos]
+
+    def min_shared(self, length: int) -> int:
+        """Lower bound of n-grams shared by a match of the given shorter length"""
+        edits = (100 - self.score_cutoff) * 2 * length // 100
+        return length - self.SIZE + 1 - self.SIZE * edits
+
+    def shortlist(self, query: str) -> Shortlist | None:
+        """Texts that can match the query, None if the bound excludes nothing"""
+        query_min = self.min_shared(len(query))
+        if query_min <= 0:
+            return None
+
+        shared = Counter()
+        for gram, repeats in Counter(ngrams(query, self.SIZE)).items():
+            postings = self._postings.get(gram, ())
+            for _ in range(repeats):
+                shared.update(postings)
+
+        candidates = [idx for idx, count in shared.items() if count >= query_min]
+        total = len(query) - self.SIZE + 1
+        complete = [idx for idx in candidates if shared[idx] == total]
+
+        # Texts shorter than the query are bounded by their own length
+        lo = bisect_left(self._lengths, 1)
+        hi = bisect_left(self._lengths, len(query), lo)
+        candidates.extend(
+            idx
+            for idx in self._by_length[lo:hi]
+            if query_min > shared[idx] >= self._required[idx]
+        )
+        return Shortlist(candidates, complete)
+
+
+class PrefixIndex:
+    """Texts in sorted order, answering prefix lookups with binary search"""
+
+    def __init__(self, texts: list[str]):
+        order = sorted(range(len(texts)), key=texts.__getitem__)
+        self._keys = [texts[idx] for idx in order]
+        self._indexes = array("i", order)
+
+    def copy(self) -> "PrefixIndex":
+        clone = copy.copy(self)
+        clone._keys = self._keys.copy()
+        clone._indexes = self._indexes[:]
+        return clone
+
+    def insert(self, idx: int, text: str) -> None:
+        pos = bisect_right(self._keys, text)
+        self._keys.insert(pos, text)
+        self._indexes.insert(pos, idx)
+
+    def remove(self, idx: int, text: str) -> None:
+        pos = self._indexes.index(idx, bisect_left(self._keys, text))
+        del self._keys[pos]
+        del self._indexes[pos]
+
+    def find(self, prefix: str) -> list[int]:
+        """Indexes of texts starting with prefix, O(log N + k)"""
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + chr(0x10FFFF), lo)
+        return self._indexes[lo:hi].tolist()
+
+
+class SearchIndex:
+    """Search catalog with titles normalized once.
+
+    Every category is stored by columns: an array of ids, the titles and
+    their normalized forms (NgramIndex.texts), all indexed by position.
+    An index is not changed once built: updated() returns a patched copy,
+    so searches running on the previous one are not affected.
+    """
+
+    # partial_ratio of a substring hit is always 100, so one cutoff covers
+    # both the substring (75) and the fuzzy (85) thresholds
+    SCORE_CUTOFF = 85
+
+    def __init__(self, teachers: list[dict], subjects: list[dict]):
+        self._ids: dict[SearchType, array] = {}
+        self._titles: dict[SearchType, list[str]] = {}
+        self._ngrams: dict[SearchType, NgramIndex] = {}
+        self._prefixes: dict[SearchType, PrefixIndex] = {}
+        for cat, items in (
+            (SearchType.teacher, teachers),
+            (SearchType.subject, subjects),
+        ):
+            self._ids[cat] = array("i", (item["id"] for item in items))
+            self._titles[cat] = [item["title"] for item in items]
+            self._ngrams[cat] = NgramIndex(
+                map(normalize, self._titles[cat]), self.SCORE_CUTOFF
+            )
+            self._prefixes[cat] = PrefixIndex(self._ngrams[cat].texts)
+
+    def __len__(self) -> int:
+        return sum(map(len, self._ids.values()))
+
+    def items(self, cat: SearchType) -> list[dict]:
+        """The catalog of a category in index order, as it was loaded"""
+        return [
+            {"title": title, "id": iid}
+            for iid, title in zip(self._ids[cat], self._titles[cat], strict=True)
+        ]
+
+    def updated(
+        self, cat: SearchType, items: list[dict], removed: Iterable[int] = ()
+    ) -> "SearchIndex":
+        """Copy with items added or retitled and the removed ids deleted.
+
+        Only the columns of the category are copied, posting lists only when
+        they change, so the cost is a few memcpy plus O(changes).
+        """
+        clone = copy.copy(self)
+        clone._ids = {**self._ids, cat: self._ids[cat][:]}
+        clone._titles = {**self._titles, cat: self._titles[cat].copy()}
+        clone._ngrams = {**self._ngrams, cat: self._ngrams[cat].copy()}
+        clone._prefixes = {**self._prefixes, cat: self._prefixes[cat].copy()}
+        clone._update(cat, items, removed)
+        return clone
+
+    def _update(self, cat: SearchType, items: list[dict], removed: Iterable[int]):
+        ids, titles = self._ids[cat], self._titles[cat]
+        ngram, prefix = self._ngrams[cat], self._prefixes[cat]
+        texts = ngram.texts
+        # Built per update instead of kept: a dict costs ~100 bytes per entry
+        positions = {iid: idx for idx, iid in enumerate(ids)}
+
+        for iid in removed:
+            idx = positions.pop(iid, None)
+            if idx is None:
+                continue
+            # The last entry moves into the hole, as NgramIndex.delete does
+            last = len(ids) - 1
+            prefix.remove(idx, texts[idx])
+            if idx != last:
+                prefix.remove(last, texts[last])
+                prefix.insert(idx, texts[last])
+                ids[idx], titles[idx] = ids[last], titles[last]
+                positions[ids[idx]] = idx
+            ids.pop()
+            titles.pop()
+            ngram.delete(idx)
+
+        for item in items:
+            iid, title = item["id"], item["title"]
+            idx = positions.setdefault(iid, len(ids))
+            if idx == len(ids):
+                ids.append(iid)
+                titles.append(title)
+            elif titles[idx] == title:
+                continue
+            else:
+                prefix.remove(idx, texts[idx])
+                titles[idx] = title
+            normalized = normalize(title)
+            prefix.insert(idx, normalized)
+            ngram.set(idx, normalized)
+
+    def search(
+        self, normalized_query: str, categories: list[SearchType], limit: int = 20
+    ) -> list[SearchItem]:
+        query = normalized_query
+        categories = [
+            (order, cat) for order, cat in enumerate(categories) if cat in self._ids
+        ]
+
+        # Priority 1: the title starts with the query
+        results = [
+            self._result(1, 100, order, cat, idx)
+            for order, cat in categories
+            for idx in self._prefixes[cat].find(query)
+        ]
+        if len(results) >= limit:
+            return self._top(results, limit)
+
+        # Priority 2: the query is a substring of the title
+        rest = []
+        for order, cat in categories:
+            index = self._ngrams[cat]
+            shortlist = index.shortlist(query)
+            if shortlist is None:
+                candidates = complete = range(len(index.texts))
+            else:
+                candidates, complete = shortlist
+
+            substrings = set()
+            for idx in complete:
+                text = index.texts[idx]
+                if query in text:
+                    substrings.add(idx)
+                    if not text.startswith(query):
+                        results.append(self._result(2, 100, order, cat, idx))
+            rest.append((order, cat, [i for i in candidates if i not in substrings]))
+        if len(results) >= limit:
+            return self._top(results, limit)
+
+        # Priority 3: fuzzy match
+        for order, cat, fuzzy in rest:
+            texts = self._ngrams[cat].texts
+            hits = process.extract(
+                query,
+                [texts[idx] for idx in fuzzy],
+                scorer=fuzz.partial_ratio,
+                score_cutoff=self.SCORE_CUTOFF,
+                limit=None,
+            )
+            for _, score, pos in hits:
+                results.append(self._result(3, score, order, cat, fuzzy[pos]))
+
+        return self._top(results, limit)
+
+    def _result(
+        self, priority: int, score: float, order: int, cat: SearchType, idx: int
+    ) -> tuple:
+        title = self._titles[cat][idx]
+        # (order, idx) keeps ties in catalog order, as the sequential scan did
+        return (priority, -score, first_word(title), order, idx, cat)
+
+    def _top(self, results: list[tuple], limit: int) -> list[SearchItem]:
+        return [
+            SearchItem(id=self._ids[cat][idx], title=self._titles[cat][idx], type=cat)
+            for *_, idx, cat in heapq.nsmallest(limit, results, key=lambda x: x[:5])
+        ]
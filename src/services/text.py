@@ -0,0 +1,37 @@
+import re
+from functools import lru_cache
+from operator import itemgetter
+
+# Distinct search queries kept normalized; a query is a few dozen bytes
+QUERY_CACHE_SIZE = 4096
+
+# What str.split() and \s of re treat as whitespace besides " ". The classes
+# of Postgres regexes follow LC_CTYPE instead (glibc leaves out no-break
+# spaces), so SQL versions of normalize() turn these into spaces first
+WHITESPACE = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+)
+
+_REPEATS = re.compile(r"(.)\1+")
+_DISALLOWED = re.compile(r"[^а-яa-z0-9\s]+")
+# A callable replacement skips re's template expansion, ~3x faster than r"\1"
+_FIRST_GROUP = itemgetter(1)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, ё → е, collapse repeated characters, keep letters/digits.
+
+    Repeats are collapsed before stripping, "а!!а" gives "аа", so the two
+    steps cannot share one pass.
+    """
+    if not text:
+        return ""
+    text = _REPEATS.sub(_FIRST_GROUP, text.lower().replace("ё", "е"))
+    return " ".join(_DISALLOWED.sub("", text).split())
+
+
+# Queries repeat a lot (typing, popular names), titles are normalized once
+# per index build and would only evict them, so they use normalize()
+normalize_query = lru_cache(maxsize=QUERY_CACHE_SIZE)(normalize)
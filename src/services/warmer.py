@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from core.cache import DataVersions, data_versions
+from services.reviews import ReviewsService
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """Keeps the search and registry snapshot loaded ahead of requests.
+
+    Loads it at startup and reloads it as soon as a data version moves, here
+    or in another worker, so requests find it fresh instead of reloading it
+    inline. A request only reloads when it comes before the warmer caught
+    up, and then shares the reload with it (see ReviewsService._single_flight).
+    """
+
+    RETRY_DELAY = 5.0
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        versions: DataVersions = data_versions,
+    ):
+        self.session_factory = session_factory
+        self.versions = versions
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._changed.set()
+        self.versions.listeners.append(self._changed.set)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._changed.set in self.versions.listeners:
+            self.versions.listeners.remove(self._changed.set)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._changed.wait()
+            # Touches made during the reload set it again
+            self._changed.clear()
+            try:
+                async with self.session_factory() as session:
+                    await ReviewsService(session).reload_cache()
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Cache warm-up failed, retrying: {e}")
+                self._changed.set()
+                await asyncio.sleep(self.RETRY_DELAY)
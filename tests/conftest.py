@@ -12,6 +12,7 @@ import models.content
 import models.insights
 import models.reviews  # noqa: F401
 from core.database import Base, get_database
+from core.schema import create_extensions
 from main import app
 from models.schemas import CONTENT_SCHEMA, GSPARSER_SCHEMA
 
@@ -102,6 +103,7 @@ async def init_database_schema(postgres_container):
     async with engine.begin() as conn:
         await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {CONTENT_SCHEMA}"))
         await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {GSPARSER_SCHEMA}"))
+        await create_extensions(conn)
         await conn.run_sync(Base.metadata.create_all)
 
     await engine.dispose()
@@ -0,0 +1,123 @@
+import asyncio
+
+from sqlalchemy import insert
+
+from core.cache import CATALOG, DataVersions, VersionBroadcaster
+from models.cache import DataVersion
+from models.reviews import Comment, RelationST, Source, Subject, Teacher
+from services.reviews import page_resources
+
+
+async def started(postgres_container, release: str):
+    dsn = postgres_container.get_connection_url().replace(
+        "postgresql+psycopg2", "postgresql", 1
+    )
+    versions = DataVersions()
+    broadcaster = VersionBroadcaster(
+        versions, dsn, DataVersion.__table__.fullname, release
+    )
+    await broadcaster.start()
+    return versions, broadcaster
+
+
+async def test_workers_of_a_release_share_versions(postgres_container, db_session):
+    first, first_broadcaster = await started(postgres_container, "a")
+    second, second_broadcaster = await started(postgres_container, "a")
+    try:
+        # Второй воркер не сбрасывает версии первого
+        assert second.start == first.start
+        first.touch("subject:2")
+        for _ in range(50):
+            if second.get("subject:2") == first.get("subject:2"):
+                break
+            await asyncio.sleep(0.1)
+        assert second.get("subject:2") == first.get("subject:2") > first.start
+    finally:
+        await first_broadcaster.stop()
+        await second_broadcaster.stop()
+
+    # Перезапуск подхватывает эпоху и версии из таблицы
+    restarted, broadcaster = await started(postgres_container, "a")
+    await broadcaster.stop()
+    assert restarted.start == first.start
+    assert restarted.get("subject:2") == first.get("subject:2")
+
+    # Новый релиз начинает новую эпоху
+    deployed, broadcaster = await started(postgres_container, "b")
+    await broadcaster.stop()
+    assert deployed.start > first.get("subject:2")
+    assert deployed.get("subject:2") == deployed.start
+
+
+async def test_every_start_without_release_moves_the_epoch(
+    postgres_container, db_session
+):
+    first, first_broadcaster = await started(postgres_container, "")
+    try:
+        second, second_broadcaster = await started(postgres_container, "")
+        await second_broadcaster.stop()
+        # Код мог измениться: первый воркер переходит на новую эпоху
+        for _ in range(50):
+            if first.start == second.start:
+                break
+            await asyncio.sleep(0.1)
+        assert first.start == second.start
+    finally:
+        await first_broadcaster.stop()
+
+
+async def test_page_resources(db_session):
+    await db_session.execute(
+        insert(Teacher), [{"id": i, "name": f"Преподаватель {i}"} for i in (1, 2)]
+    )
+    await db_session.execute(
+        insert(Subject), [{"id": i, "title": f"Предмет {i}"} for i in (10, 11, 12)]
+    )
+    await db_session.execute(insert(Source), [{"id": 100, "title": "Telegram"}])
+    await db_session.execute(
+        insert(RelationST),
+        [
+            {"teacher_id": 1, "subject_id": 10},
+            {"teacher_id": 1, "subject_id": 11},
+            {"teacher_id": 2, "subject_id": 12},
+        ],
+    )
+    await db_session.execute(
+        insert(Comment),
+        [
+            {
+                "id": i,
+                "date": "2024-09-01",
+                "text": "Отзыв",
+                "teacher_id": 2,
+                "subject_id": 10,
+                "source_id": 100,
+            }
+            for i in (1, 2)
+        ],
+    )
+    await db_session.commit()
+
+    # Предмет в списке преподавателя
+    assert await page_resources(db_session, {"teacher:1"}) == {
+        "teacher:1",
+        "subject:10",
+        "subject:11",
+    }
+    # Новый отзыв о предмете не трогает остальных его преподавателей
+    assert await page_resources(db_session, {"teacher:1", "subject:10"}) == {
+        "teacher:1",
+        "subject:10",
+        "subject:11",
+    }
+    # Переименованный предмет или источник виден в отзывах преподавателей
+    kinds = ("subject", "source")
+    assert await page_resources(db_session, {"subject:10", "source:100"}, kinds) == {
+        "subject:10",
+        "source:100",
+        "teacher:2",
+    }
+    assert await page_resources(db_session, {CATALOG, "subject:11"}, kinds) == {
+        CATALOG,
+        "subject:11",
+    }
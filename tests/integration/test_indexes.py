@@ -0,0 +1,190 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, func, insert, select, text
+
+from core.schema import create_indexes
+from enums.reviews import SuggestionStatus
+from models.content import Suggestion
+from models.reviews import Comment, RelationST, Source, Subject, Summary, Teacher
+from services.reviews import ReviewsService
+
+TEACHERS = 500
+SUBJECTS = 50
+
+
+async def populate(session):
+    """Достаточно строк, чтобы планировщик выбирал индексы, а не Seq Scan"""
+    await session.execute(
+        insert(Teacher),
+        [{"id": i, "name": f"Преподаватель {i}"} for i in range(TEACHERS)],
+    )
+    await session.execute(
+        insert(Subject), [{"id": i, "title": f"Предмет {i}"} for i in range(SUBJECTS)]
+    )
+    await session.execute(insert(Source), [{"id": 1, "title": "Telegram"}])
+    await session.execute(
+        insert(RelationST),
+        [
+            {"subject_id": (t + k * 7) % SUBJECTS, "teacher_id": t}
+            for t in range(TEACHERS)
+            for k in range(5)
+        ],
+    )
+    await session.execute(
+        insert(Summary),
+        [
+            {"id": t * 5 + k, "title": "Лекции", "value": "ок", "teacher_id": t}
+            for t in range(TEACHERS)
+            for k in range(5)
+        ],
+    )
+    await session.execute(
+        insert(Comment),
+        [
+            {
+                "id": t * 40 + k,
+                "date": "2024-09-01",
+                "text": "Отзыв " * 10,
+                "teacher_id": t,
+                "subject_id": (t + k) % SUBJECTS,
+                "source_id": 1,
+            }
+            for t in range(TEACHERS)
+            for k in range(40)
+        ],
+    )
+    await session.execute(
+        insert(Suggestion),
+        [
+            {
+                "status": SuggestionStatus.delayed
+                if i % 100 == 0
+                else SuggestionStatus.accepted,
+                "text": "Отзыв",
+                "date": "01.01.2024",
+            }
+            for i in range(10_000)
+        ],
+    )
+    await session.commit()
+    await session.execute(text("ANALYZE"))
+
+
+async def explained(session, run) -> str:
+    """Планы всех запросов, которые выполнила run()"""
+    engine = session.bind.sync_engine
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        await run()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    conn = await session.connection()
+    plans = []
+    for statement, parameters in statements:
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        plans.append("\n".join(result.scalars()))
+    return "\n".join(plans)
+
+
+async def test_hot_queries_use_indexes(db_session):
+    await populate(db_session)
+    service = ReviewsService(db_session)
+
+    plans = {
+        "teacher": await explained(db_session, lambda: service.teacher(7)),
+        "teacher document": await explained(
+            db_session, lambda: service._teacher_document(7, 50, None)
+        ),
+        "comments page": await explained(
+            db_session, lambda: service._comments_document(7, 10, 7 * 40 + 5)
+        ),
+        "subject": await explained(db_session, lambda: service.subject(3)),
+        # Счётчик очереди модерации в DashboardAdmin.index
+        "dashboard": await explained(
+            db_session,
+            lambda: db_session.scalar(
+                select(func.count(Suggestion.id)).where(
+                    Suggestion.status == SuggestionStatus.delayed
+                )
+            ),
+        ),
+    }
+
+    for name, plan in plans.items():
+        for table in ("comment", "summary", "relationst", "suggestion"):
+            assert f"Seq Scan on {table} " not in plan, (name, plan)
+    assert "ix_comment_teacher_id_id" in plans["teacher"]
+    assert "ix_summary_teacher_id" in plans["teacher"]
+    assert "ix_comment_teacher_id_id" in plans["teacher document"]
+    assert "ix_comment_teacher_id_id" in plans["comments page"]
+    assert "relationst_pkey" in plans["subject"]
+    assert "ix_comment_teacher_id_id" in plans["subject"]
+    assert "ix_suggestion_delayed" in plans["dashboard"]
+
+
+async def index_valid(conn, name: str) -> bool | None:
+    return await conn.scalar(
+        text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ),
+        {"name": name},
+    )
+
+
+@pytest.mark.parametrize("broken", ["missing", "invalid"])
+async def test_create_indexes_repairs_existing_database(db_engine, db_session, broken):
+    await db_session.execute(insert(Teacher), [{"id": 1, "name": "Иванов И.И."}])
+    await db_session.execute(
+        insert(Summary),
+        [{"id": i, "title": "Лекции", "teacher_id": 1} for i in range(2)],
+    )
+    await db_session.commit()
+
+    async with db_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("DROP INDEX public.ix_summary_teacher_id"))
+        if broken == "invalid":
+            # Сборка, упавшая на дубликатах, оставляет невалидный индекс
+            with pytest.raises(Exception, match="could not create unique index"):
+                await conn.execute(
+                    text(
+                        "CREATE UNIQUE INDEX CONCURRENTLY ix_summary_teacher_id "
+                        "ON public.summary (teacher_id)"
+                    )
+                )
+            assert await index_valid(conn, "ix_summary_teacher_id") is False
+
+        await create_indexes(db_engine)
+        assert await index_valid(conn, "ix_summary_teacher_id") is True
+        # Пересобран по модели: не уникальный
+        assert not await conn.scalar(
+            text(
+                "SELECT i.indisunique FROM pg_index i JOIN pg_class c "
+                "ON c.oid = i.indexrelid WHERE c.relname = 'ix_summary_teacher_id'"
+            )
+        )
+
+
+async def test_create_indexes_in_several_workers(db_engine, db_session):
+    await db_session.execute(insert(Teacher), [{"id": 1, "name": "Иванов И.И."}])
+    await db_session.commit()
+    async with db_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("DROP INDEX public.ix_summary_teacher_id"))
+        await conn.execute(text("DROP INDEX public.ix_comment_subject_id"))
+
+        # Воркеры стартуют одновременно: ждущий блокировку не должен
+        # держать снимок, которого ждёт CREATE INDEX CONCURRENTLY
+        await asyncio.wait_for(
+            asyncio.gather(create_indexes(db_engine), create_indexes(db_engine)), 60
+        )
+        assert await index_valid(conn, "ix_summary_teacher_id") is True
+        assert await index_valid(conn, "ix_comment_subject_id") is True
@@ -3,9 +3,12 @@ from unittest.mock import AsyncMock
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from core.responses import PrecompressedJSON
 from main import app
 from schemas.insights import InsightsEssential
 from schemas.reviews import (
+    CommentSchema,
+    CommentsPage,
     RegistryResponse,
     SearchItem,
     SearchResponse,
@@ -13,12 +16,19 @@ from schemas.reviews import (
     SuggestionResponse,
     TeacherResponse,
 )
-from services.reviews import get_reviews_service
+from services.reviews import CacheSnapshot, ReviewsService, get_reviews_service
+from services.search import SearchIndex
+
+
+def prepared(model):
+    """Ответ в том виде, в каком его кеширует сервис"""
+    return PrecompressedJSON(model.model_dump_json(exclude_none=True).encode())
 
 
 @pytest.fixture
 def mock_reviews_service():
     service = AsyncMock()
+    service.served_version = None
     return service
 
 
@@ -70,8 +80,8 @@ async def test_search_not_found(client, mock_reviews_service):
 
 
 async def test_get_teacher_success(client, mock_reviews_service):
-    mock_reviews_service.teacher.return_value = TeacherResponse(
-        id=1, name="Петров П.П.", summaries=[], comments=[]
+    mock_reviews_service.teacher_body.return_value = prepared(
+        TeacherResponse(id=1, name="Петров П.П.", summaries=[], comments=[])
     )
 
     response = await client.get("/teacher/1")
@@ -82,20 +92,56 @@ async def test_get_teacher_success(client, mock_reviews_service):
 
 
 async def test_get_teacher_not_found(client, mock_reviews_service):
-    mock_reviews_service.teacher.return_value = None
+    mock_reviews_service.teacher_body.return_value = None
 
     response = await client.get("/teacher/999")
     assert response.status_code == 404
 
 
+async def test_get_teacher_comments_page(client, mock_reviews_service):
+    comment = CommentSchema(
+        id=7,
+        date="01.01.2024",
+        text="Норм",
+        subject={"title": "Алгебра"},
+        source={"title": "Чат"},
+    )
+    mock_reviews_service.comments_body.return_value = prepared(
+        CommentsPage(comments=[comment], next=7)
+    )
+
+    response = await client.get("/teacher/1/comments?limit=1&after=3")
+
+    assert response.status_code == 200
+    assert response.json()["next"] == 7
+    mock_reviews_service.comments_body.assert_awaited_once_with(1, 1, 3)
+
+
+@pytest.mark.parametrize("limit", [0, 100_000])
+async def test_get_teacher_limit_out_of_range(client, limit):
+    response = await client.get(f"/teacher/1?limit={limit}")
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("path", ["/teacher/1", "/teacher/1/comments"])
+@pytest.mark.parametrize("after", [-1, 2**31, 99_999_999_999])
+async def test_get_teacher_after_out_of_range(
+    client, mock_reviews_service, path, after
+):
+    response = await client.get(f"{path}?after={after}")
+    assert response.status_code == 422
+    mock_reviews_service.teacher_body.assert_not_called()
+    mock_reviews_service.comments_body.assert_not_called()
+
+
 # ============================================================================
 # GET /subject/{iid}
 # ============================================================================
 
 
 async def test_get_subject_success(client, mock_reviews_service):
-    mock_reviews_service.subject.return_value = SubjectResponse(
-        id=10, title="Математика", teachers=[]
+    mock_reviews_service.subject_body.return_value = prepared(
+        SubjectResponse(id=10, title="Математика", teachers=[])
     )
 
     response = await client.get("/subject/10")
@@ -106,7 +152,7 @@ async def test_get_subject_success(client, mock_reviews_service):
 
 
 async def test_get_subject_not_found(client, mock_reviews_service):
-    mock_reviews_service.subject.return_value = None
+    mock_reviews_service.subject_body.return_value = None
 
     response = await client.get("/subject/999")
     assert response.status_code == 404
@@ -196,7 +242,7 @@ async def test_get_registry_success(client, mock_reviews_service):
         },
     )
 
-    mock_reviews_service.registry.return_value = mock_registry
+    mock_reviews_service.registry_body.return_value = prepared(mock_registry)
 
     response = await client.get("/registry")
 
@@ -229,7 +275,7 @@ async def test_get_registry_empty(client, mock_reviews_service):
         insights={},
     )
 
-    mock_reviews_service.registry.return_value = mock_registry
+    mock_reviews_service.registry_body.return_value = prepared(mock_registry)
 
     response = await client.get("/registry")
 
@@ -238,3 +284,65 @@ async def test_get_registry_empty(client, mock_reviews_service):
     assert data["original"] == {}
     assert data["normalized"] == {}
     assert data["insights"] == {}
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+async def test_get_registry_compressed(client, mock_reviews_service, encoding):
+    """
+    Реестр отдаётся заранее сжатым в поддерживаемой клиентом кодировке.
+    """
+    mock_registry = RegistryResponse(
+        original={"Иванов И.И.": 1}, normalized={"иванови.и.": 1}, insights={}
+    )
+    mock_reviews_service.registry_body.return_value = prepared(mock_registry)
+
+    response = await client.get("/registry", headers={"Accept-Encoding": encoding})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json()["original"] == {"Иванов И.И.": 1}
+
+
+async def test_search_compressed_on_the_fly(client, mock_reviews_service):
+    """
+    Большая выдача поиска сжимается на лету, ETag учитывает кодировку.
+    """
+    mock_reviews_service.search.return_value = SearchResponse(
+        results=[
+            SearchItem(id=i, title=f"Иванов {i}", type="teacher") for i in range(100)
+        ]
+    )
+
+    response = await client.get(
+        "/search?query=иван", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"].endswith('-gzip"')
+    assert len(response.json()["results"]) == 100
+
+
+# ============================================================================
+# GET /ready
+# ============================================================================
+
+
+async def test_ready_after_caches_loaded(client, monkeypatch):
+    monkeypatch.setattr(ReviewsService, "_snapshot", CacheSnapshot())
+
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "loading"}
+
+    loaded = CacheSnapshot(
+        search_index=SearchIndex([], []),
+        registry=RegistryResponse(original={}, normalized={}, insights={}),
+    )
+    monkeypatch.setattr(ReviewsService, "_snapshot", loaded)
+
+    response = await client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
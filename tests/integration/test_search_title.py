@@ -0,0 +1,36 @@
+from sqlalchemy import select
+
+from core.schema import check_case_folding
+from models.reviews import Subject, Teacher
+from services.text import WHITESPACE, normalize
+
+# Всё, что normalize() приводит к одному виду
+TITLES = [
+    "Ёжиков Пётр Алексеевич",
+    "ИВАНОВ-Петров И.И.",
+    "Аааа!!а  ббб",
+    "  Матанализ\n(часть 2)  ",
+    "Теория\tвероятностей\r\nи МАТСТАТ",
+    "Ии\xa0Ии",
+    "Математика и ЛОГИКА",
+    "O'Neil Ёё ЁЁ — «Программирование»",
+    "Всё, что    угодно...",
+    "a_b №5 С++",
+    "",
+    "!!!",
+    f"Пробелы{WHITESPACE}всех видов",
+]
+
+
+async def test_search_title_matches_normalize(db_session):
+    await check_case_folding(await db_session.connection())
+    db_session.add_all(Teacher(id=i, name=title) for i, title in enumerate(TITLES))
+    db_session.add_all(Subject(id=i, title=title) for i, title in enumerate(TITLES))
+    await db_session.commit()
+
+    for model, column in ((Teacher, Teacher.name), (Subject, Subject.title)):
+        rows = await db_session.execute(
+            select(column, model.search_title).order_by(model.id)
+        )
+        for title, search_title in rows.all():
+            assert search_title == normalize(title), title
@@ -0,0 +1,115 @@
+from enums.insights import (
+    ConfidenceScore,
+    DifficultyScore,
+    GradingFairnessScore,
+    OrganizationScore,
+    RatingScore,
+    StrictnessScore,
+    StudentAttitudeScore,
+    TeachingScore,
+    WorkloadScore,
+)
+from models.insights import Insights
+from models.reviews import Comment, Source, Subject, Summary, Teacher
+from services.reviews import ReviewsService
+
+# Всё, что to_json() и pydantic должны экранировать одинаково
+TRICKY = 'Кавычки " и \\ слэш /, перевод\nстроки\tтаб \x01 ё 🙂'
+
+
+async def bodies(
+    session, iid: int, limit: int = 50, after: int | None = None, comments=False
+) -> dict[str, bytes | None]:
+    """Тело /teacher или /teacher/{iid}/comments в обоих режимах, в обход кеша"""
+    service = ReviewsService(session)
+    loaders = {
+        "orm": service._teacher_orm_document,
+        "postgres": service._teacher_document,
+    }
+    if comments:
+        loaders = {
+            "orm": service._comments_orm_document,
+            "postgres": service._comments_document,
+        }
+    result = {}
+    for backend, load in loaders.items():
+        result[backend] = await load(iid, limit, after)
+        session.expunge_all()
+    return result
+
+
+async def test_teacher_document_matches_orm_bytes(db_session):
+    teacher = Teacher(id=1, name=TRICKY)
+    db_session.add_all(
+        [
+            teacher,
+            Teacher(id=2, name="Без отзывов"),
+            Subject(id=10, title="Матанализ"),
+            Subject(id=11, title=TRICKY),
+            Source(id=100, title="Telegram", link="https://t.me/c/1"),
+            Source(id=101, title="Устно", link=None),
+        ]
+    )
+    await db_session.flush()
+    db_session.add_all(
+        [
+            Insights(
+                id=1,
+                summary=TRICKY,
+                pros=["объясняет", TRICKY],
+                cons=[],
+                highlights=["ё"],
+                teaching_value=TeachingScore.HIGH,
+                teaching_reason="a",
+                student_attitude_value=StudentAttitudeScore.UNKNOWN,
+                student_attitude_reason="b",
+                organization_value=OrganizationScore.UNKNOWN,
+                organization_reason="c",
+                grading_fairness_value=GradingFairnessScore.UNKNOWN,
+                grading_fairness_reason="d",
+                strictness_value=StrictnessScore.UNKNOWN,
+                strictness_reason="e",
+                workload_value=WorkloadScore.UNKNOWN,
+                workload_reason="f",
+                difficulty_value=DifficultyScore.UNKNOWN,
+                difficulty_reason="g",
+                rating_value=RatingScore.POSITIVE,
+                rating_reason="h",
+                confidence_value=ConfidenceScore.LOW,
+                confidence_reason="i",
+            ),
+            Summary(id=2, title="Экзамен", value=TRICKY, teacher_id=1),
+            Summary(id=1, title="Лекции", value="скучно", teacher_id=1),
+            *(
+                Comment(
+                    id=i,
+                    date=f"2024-0{i % 9 + 1}-01",
+                    text=f"{TRICKY} {i}",
+                    teacher_id=1,
+                    subject_id=10 + i % 2,
+                    source_id=100 + i % 2,
+                )
+                for i in (5, 3, 4, 1, 2)
+            ),
+        ]
+    )
+    await db_session.commit()
+
+    for iid in (1, 2, 3):
+        result = await bodies(db_session, iid)
+        assert result["postgres"] == result["orm"], iid
+
+    body = (await bodies(db_session, 1))["postgres"]
+    assert body.startswith(b'{"id":1,"name":"')
+    assert b'"next"' not in body
+
+    # Страницы по ключу: next — id последнего комментария страницы
+    for limit, after in ((2, None), (2, 2), (2, 4), (3, 0), (1, 5), (5, 1)):
+        for comments in (False, True):
+            result = await bodies(db_session, 1, limit, after, comments)
+            assert result["postgres"] == result["orm"], (limit, after, comments)
+
+    body = (await bodies(db_session, 1, 2, 2, comments=True))["orm"]
+    assert body.startswith(b'{"comments":[{"id":3,')
+    assert body.endswith(b'"next":4}')
+    assert (await bodies(db_session, 3, comments=True))["postgres"] is None
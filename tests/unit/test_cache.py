@@ -0,0 +1,161 @@
+import json
+from unittest.mock import AsyncMock
+
+from core import cache
+from core.cache import (
+    CATALOG,
+    EPOCH,
+    REGISTRY,
+    DataVersions,
+    ResponseCache,
+    TTLCache,
+    VersionBroadcaster,
+)
+from core.config import settings
+from main import data_release
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    lru = TTLCache(maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1  # "a" становится самым свежим
+    lru.set("c", 3)
+
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+    assert len(lru) == 2
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    lru = TTLCache(maxsize=10, ttl=5)
+    lru.set("a", 1)
+
+    now += 4.9
+    assert lru.get("a") == 1
+    now += 0.1
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_response_cache_bounded_by_bytes():
+    responses = ResponseCache(max_bytes=10)
+    responses.set("a", b"aaaa", 4, version=1)
+    responses.set("b", b"bbbb", 4, version=1)
+    responses.get("a", 1)
+    responses.set("c", b"cccc", 4, version=1)
+
+    assert responses.get("b", 1) is None
+    assert responses.nbytes == 8
+    # Ответ больше всего бюджета не кешируется
+    assert not responses.set("d", b"d" * 11, 11, version=1)
+
+
+def test_response_cache_drops_outdated_entries():
+    responses = ResponseCache(max_bytes=100)
+    responses.set("a", b"a", 1, version=5)
+
+    assert responses.get("a", 5) == b"a"
+    assert responses.get("a", 6) is None
+    assert len(responses) == 0
+
+
+def test_data_versions_per_resource():
+    versions = DataVersions()
+    registry = versions.get(REGISTRY)
+
+    versions.touch("subject:7")
+    assert versions.get(REGISTRY) == registry
+    assert versions.get("teacher:1") == versions.start
+
+    assert versions.get("subject:7") > versions.start
+    assert versions.get() == versions.clock
+
+    versions.touch()
+    assert versions.get() == versions.get("subject:7")
+
+
+def test_data_versions_apply_remote_touches():
+    versions = DataVersions()
+    published = []
+    versions.publish = published.append
+
+    versions.touch("teacher:1")
+    touched = versions.get("teacher:1")
+    assert published == [{"teacher:1": touched}]
+
+    # Версии других воркеров только растут и двигают часы
+    versions.apply({"teacher:1": touched - 1, "subject:2": touched + 10})
+    assert versions.get("teacher:1") == touched
+    assert versions.get("subject:2") == versions.get() == touched + 10
+
+    # Новая эпоха покрывает все более старые версии
+    versions.apply({EPOCH: touched + 20})
+    assert versions.get("teacher:1") == versions.get("teacher:9") == touched + 20
+
+
+def test_data_versions_adopt_epoch_of_release():
+    first = DataVersions()
+    versions = DataVersions()
+    versions.touch("teacher:1")
+    touched = versions.get("teacher:1")
+    notified = []
+    versions.listeners.append(lambda: notified.append(True))
+
+    # Перезапуск продолжает эпоху первого воркера релиза: часы не отстают
+    versions.adopt(first.start)
+    assert versions.get("teacher:2") == first.start
+    assert versions.get("teacher:1") == touched
+    assert versions.get() >= touched
+    assert notified == [True]
+
+    versions.adopt(first.start)
+    assert notified == [True]
+
+
+def test_data_release_follows_code_and_response_settings(monkeypatch):
+    monkeypatch.setattr(settings, "RELEASE", "")
+    assert data_release() == ""
+
+    monkeypatch.setattr(settings, "RELEASE", "abc123")
+    release = data_release()
+    assert release.startswith("abc123:")
+    monkeypatch.setattr(settings, "LOG_LEVEL", "DEBUG")
+    assert data_release() == release
+    # Другой порядок или размер страницы — другие тела под теми же версиями
+    monkeypatch.setattr(settings, "COMMENTS_PAGE_SIZE", settings.COMMENTS_PAGE_SIZE + 1)
+    assert data_release() != release
+
+
+def test_version_broadcaster_applies_notifications():
+    versions = DataVersions()
+    broadcaster = VersionBroadcaster(versions, "postgresql://", "data_version")
+
+    payload = json.dumps({"versions": {REGISTRY: versions.start + 5}, "last": True})
+    broadcaster._on_notify(None, 1, VersionBroadcaster.CHANNEL, payload)
+    assert versions.get(REGISTRY) == versions.start + 5
+
+
+async def test_version_broadcaster_applies_a_touch_at_once(monkeypatch):
+    monkeypatch.setattr(VersionBroadcaster, "CHUNK", 2)
+    sender = VersionBroadcaster(DataVersions(), "postgresql://", "data_version")
+    conn = AsyncMock()
+    touched = {CATALOG: 10, "teacher:1": 10, "subject:5": 10}
+    await sender._upsert(conn, touched)
+    payloads = [
+        c.args[2] for c in conn.execute.call_args_list if "pg_notify" in c.args[0]
+    ]
+    assert len(payloads) == 2
+
+    versions = DataVersions()
+    versions.start = versions.clock = 1
+    receiver = VersionBroadcaster(versions, "postgresql://", "data_version")
+    receiver._on_notify(None, 7, VersionBroadcaster.CHANNEL, payloads[0])
+    # Перезагрузка между частями не должна счесть каталог свежим
+    loaded = versions.get()
+    assert versions.get(CATALOG) <= loaded
+    receiver._on_notify(None, 7, VersionBroadcaster.CHANNEL, payloads[1])
+    assert versions.get(CATALOG) > loaded
+    assert sorted(versions.changed(loaded)) == sorted(touched)
@@ -0,0 +1,89 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.cache import CATALOG, REGISTRY, DataVersions, data_versions
+from services.reviews import CacheSnapshot, ReviewsService
+from services.warmer import CacheWarmer
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    ReviewsService._snapshot = CacheSnapshot()
+    yield
+    ReviewsService._snapshot = CacheSnapshot()
+
+
+@pytest.fixture
+def session_factory(mock_db):
+    mock_teachers = MagicMock()
+    mock_teachers.all.return_value = [(1, "Иванов")]
+    mock_subjects = MagicMock()
+    mock_subjects.all.return_value = []
+    mock_insights = MagicMock()
+    mock_insights.scalars.return_value = []
+    results = {
+        "teacher": mock_teachers,
+        "subject": mock_subjects,
+        "insights": mock_insights,
+    }
+    mock_db.execute.side_effect = lambda stmt: results[stmt.get_final_froms()[0].name]
+
+    @asynccontextmanager
+    async def factory():
+        yield mock_db
+
+    return factory
+
+
+async def settle():
+    """Даём фоновой задаче (и потоку сборки индекса) доработать"""
+    for _ in range(10):
+        await asyncio.sleep(0.01)
+
+
+async def test_warmer_loads_caches_at_start(session_factory):
+    warmer = CacheWarmer(session_factory)
+    assert not ReviewsService.is_ready()
+
+    await warmer.start()
+    await settle()
+    await warmer.stop()
+
+    assert ReviewsService.is_ready()
+    assert ReviewsService._snapshot.registry_version is not None
+
+
+async def test_warmer_reloads_after_version_change(session_factory, mock_db):
+    warmer = CacheWarmer(session_factory)
+    await warmer.start()
+    await settle()
+    loaded = ReviewsService._snapshot
+
+    # Смена версии в другом воркере тоже будит прогрев
+    data_versions.apply({REGISTRY: data_versions.get() + 1})
+    await settle()
+    assert ReviewsService._snapshot.registry_version > loaded.registry_version
+    # Каталог не менялся и не перечитывался
+    assert ReviewsService._snapshot.search_index is loaded.search_index
+
+    await warmer.stop()
+    calls = mock_db.execute.call_count
+    data_versions.touch(CATALOG)
+    await settle()
+    assert mock_db.execute.call_count == calls
+
+
+async def test_data_versions_notify_listeners_only_on_change():
+    versions = DataVersions()
+    listener = MagicMock()
+    versions.listeners.append(listener)
+
+    versions.touch("teacher:1")
+    versions.apply({"teacher:1": versions.get("teacher:1")})  # своё же уведомление
+    assert listener.call_count == 1
+
+    versions.apply({"teacher:2": versions.get() + 1})
+    assert listener.call_count == 2
@@ -0,0 +1,217 @@
+import asyncio
+
+import brotli
+from fastapi import FastAPI, HTTPException, Request, Response
+from httpx import ASGITransport, AsyncClient
+
+from api.reviews import router
+from core.cache import CATALOG, REGISTRY, data_versions, touch_data_version
+from core.config import settings
+from core.etag import (
+    ETagMiddleware,
+    entity_tag,
+    etag_matches,
+    last_modified,
+    modified_since,
+    path_resource,
+)
+from core.responses import PrecompressedJSON
+from schemas.reviews import RegistryResponse
+from services.reviews import CacheSnapshot, ReviewsService, get_reviews_service
+
+
+def test_path_resource():
+    assert path_resource("/registry") == REGISTRY
+    assert path_resource("/search") == CATALOG
+    assert path_resource("/teacher/12") == "teacher:12"
+    assert path_resource("/subject/3") == "subject:3"
+    assert path_resource("/teacher/12/comments") == "teacher:12"
+    assert path_resource("/teacher/abc") is None
+    assert path_resource("/index.html") is None
+
+
+def test_etag_matches_lists_and_weak_tags():
+    assert etag_matches('"5"', 5)
+    assert etag_matches('W/"5"', 5)
+    assert etag_matches('"3", W/"4" ,"5-br"', 5)
+    # Сжатый вариант той же версии тоже подходит клиенту
+    assert etag_matches('"5-gzip"', 5)
+    assert not etag_matches('"4", "50", "5x"', 5)
+    assert not etag_matches("", 5)
+
+
+def test_modified_since():
+    version = 1_700_000_000 * 10**9 + 123
+    assert last_modified(version) == "Tue, 14 Nov 2023 22:13:20 GMT"
+    assert not modified_since(last_modified(version), version)
+    assert modified_since("Tue, 14 Nov 2023 22:13:19 GMT", version)
+    assert modified_since("вчера", version)
+
+
+async def test_etag_changes_only_with_its_resource():
+    app = FastAPI()
+    app.add_middleware(ETagMiddleware)
+
+    @app.get("/teacher/{iid}")
+    async def teacher(iid: int):
+        return {"id": iid}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        etag = (await client.get("/teacher/1")).headers["etag"]
+
+        # Модерация другого преподавателя не сбрасывает кеш клиента
+        touch_data_version("teacher:2", CATALOG)
+        response = await client.get("/teacher/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        touch_data_version("teacher:1")
+        response = await client.get("/teacher/1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+
+async def test_etag_304_skips_the_endpoint():
+    app = FastAPI()
+    app.add_middleware(ETagMiddleware)
+    calls = []
+
+    @app.get("/registry")
+    async def registry():
+        calls.append(1)
+        return {"teachers": []}
+
+    @app.get("/teacher/{iid}")
+    async def teacher(iid: int):
+        raise HTTPException(status_code=404)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/registry")
+        assert response.headers["cache-control"] == "no-cache"
+
+        response = await client.get(
+            "/registry", headers={"If-None-Match": response.headers["etag"]}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert len(calls) == 1
+
+        # Ошибки не кешируются клиентом
+        response = await client.get("/teacher/1")
+        assert response.status_code == 404
+        assert "etag" not in response.headers
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(ETagMiddleware)
+
+    @app.get("/registry")
+    async def registry(request: Request):
+        if "br" in request.headers.get("accept-encoding", ""):
+            body = brotli.compress(b"{}")
+            return Response(body, headers={"Content-Encoding": "br"})
+        return Response(b"{}", media_type="application/json")
+
+    return app
+
+
+async def test_etag_per_coding_and_last_modified():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_app()), base_url="http://test"
+    ) as client:
+        version = data_versions.get(REGISTRY)
+        plain = await client.get("/registry", headers={"Accept-Encoding": "gzip"})
+        assert plain.headers["etag"] == entity_tag(version)
+        assert plain.headers["last-modified"] == last_modified(version)
+        # Байты сжатого варианта другие, значит и сильный ETag другой
+        br = await client.get("/registry", headers={"Accept-Encoding": "br"})
+        assert br.headers["etag"] == entity_tag(version, "br")
+
+        for headers in (
+            {"If-None-Match": f'"0", W/{br.headers["etag"]}'},
+            {"If-Modified-Since": plain.headers["last-modified"]},
+        ):
+            response = await client.get("/registry", headers=headers)
+            assert response.status_code == 304, headers
+            assert response.headers["etag"] == entity_tag(version)
+
+        # If-None-Match важнее If-Modified-Since
+        response = await client.get(
+            "/registry",
+            headers={
+                "If-None-Match": '"0"',
+                "If-Modified-Since": plain.headers["last-modified"],
+            },
+        )
+        assert response.status_code == 200
+
+
+async def test_etag_any_tag_matches_existing_response():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_app()), base_url="http://test"
+    ) as client:
+        response = await client.get("/registry", headers={"If-None-Match": "*"})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert "etag" in response.headers
+        assert "content-type" not in response.headers
+
+        response = await client.get("/missing", headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+
+
+async def test_etag_keeps_validators_of_the_handler():
+    app = FastAPI()
+    app.add_middleware(ETagMiddleware)
+
+    @app.get("/index.html")
+    async def index():
+        return Response(b"<html></html>", headers={"ETag": '"abc"'})
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/index.html")
+
+    assert response.headers["etag"] == '"abc"'
+    assert "last-modified" not in response.headers
+
+
+async def test_etag_of_a_stale_snapshot(mock_db, monkeypatch):
+    """stale-while-revalidate отдаёт прежний реестр под его же ETag"""
+    monkeypatch.setattr(settings, "CACHE_STALE_WHILE_REVALIDATE", True)
+    old = data_versions.get(REGISTRY)
+    registry = RegistryResponse(original={"old": 1}, normalized={}, insights={})
+    snapshot = CacheSnapshot(
+        registry_version=old,
+        registry=registry,
+        registry_body=PrecompressedJSON(registry.model_dump_json().encode()),
+    )
+    monkeypatch.setattr(ReviewsService, "_snapshot", snapshot)
+    touch_data_version(REGISTRY)
+    # Новый реестр ещё грузит прогреватель
+    flight = asyncio.get_running_loop().create_future()
+    monkeypatch.setitem(ReviewsService._reloads, REGISTRY, flight)
+
+    app = FastAPI()
+    app.add_middleware(ETagMiddleware)
+    app.include_router(router)
+    app.dependency_overrides[get_reviews_service] = lambda: ReviewsService(mock_db)
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+        headers={"Accept-Encoding": "identity"},
+    ) as client:
+        response = await client.get("/registry")
+        assert response.json()["original"] == {"old": 1}
+        assert response.headers["etag"] == entity_tag(old)
+        assert response.headers["last-modified"] == last_modified(old)
+
+        # Клиент со старым телом не получает 304, пока данные не догнали версию
+        response = await client.get("/registry", headers={"If-None-Match": f'"{old}"'})
+        assert response.status_code == 200
+    flight.set_result(None)
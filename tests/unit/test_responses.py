@@ -0,0 +1,97 @@
+import gzip
+
+import brotli
+from fastapi import FastAPI, Response
+from httpx import ASGITransport, AsyncClient
+
+from core.responses import (
+    CompressionMiddleware,
+    PrecompressedJSON,
+    accepted_encodings,
+    preferred_encoding,
+)
+
+
+def test_accepted_encodings_skips_q_zero():
+    header = "gzip;q=0.8, br ; q=0, deflate, identity;q=bad"
+    assert accepted_encodings(header) == ({"gzip", "deflate"}, {"br"})
+    assert accepted_encodings(None) == (set(), set())
+
+    # "*" не отменяет явный отказ от br
+    assert preferred_encoding("br;q=0, *") == "gzip"
+    assert preferred_encoding("br;q=0, gzip;q=0, *") is None
+    assert preferred_encoding("*") == "br"
+    assert (
+        PrecompressedJSON(b"{}").response("br;q=0, *").headers["content-encoding"]
+        == "gzip"
+    )
+
+
+def test_precompressed_json_prefers_brotli():
+    body = PrecompressedJSON(b'{"a": 1}')
+
+    response = body.response("gzip, br")
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(response.body) == b'{"a": 1}'
+
+    response = body.response("gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == b'{"a": 1}'
+
+
+def test_precompressed_json_identity_and_reuse():
+    body = PrecompressedJSON(b"{}")
+
+    response = body.response(None)
+    assert "content-encoding" not in response.headers
+    assert response.body == b"{}"
+    assert response.headers["vary"] == "Accept-Encoding"
+    # Сжатый вариант вычисляется один раз
+    assert body.encoded("gzip") is body.encoded("gzip")
+
+
+async def test_compression_middleware_compresses_large_bodies():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    large = b'{"a": "' + b"x" * 1000 + b'"}'
+
+    @app.get("/large")
+    async def large_body():
+        return Response(large, media_type="application/json")
+
+    @app.get("/small")
+    async def small_body():
+        return Response(b"{}", media_type="application/json")
+
+    @app.get("/binary")
+    async def binary_body():
+        return Response(large, media_type="image/png")
+
+    @app.get("/precompressed")
+    async def precompressed():
+        return PrecompressedJSON(large).response("gzip")
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/large", headers={"Accept-Encoding": "br"})
+        assert response.headers["content-encoding"] == "br"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(large)
+        assert response.content == large
+
+        # Клиент без сжатия получает исходное тело, но ответ всё равно Vary
+        response = await client.get("/large", headers={"Accept-Encoding": ""})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.content == large
+
+        for path in ("/small", "/binary"):
+            response = await client.get(path, headers={"Accept-Encoding": "gzip"})
+            assert "content-encoding" not in response.headers, path
+            assert "vary" not in response.headers, path
+
+        # Уже сжатое не сжимается повторно
+        response = await client.get("/precompressed", headers={"Accept-Encoding": "br"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.content == large
@@ -1,4 +1,21 @@
-from services.reviews import normalize
+import random
+import re
+
+from faker import Faker
+
+from services.text import QUERY_CACHE_SIZE, WHITESPACE, normalize, normalize_query
+
+
+def reference_normalize(text):
+    """Исходная реализация normalize() на re.sub"""
+    if not text:
+        return ""
+    text = text.lower()
+    text = text.replace("ё", "е")
+    text = re.sub(r"(.)\1+", r"\1", text)
+    text = re.sub(r"[^а-яa-z0-9\s]", "", text)
+    text = " ".join(text.split())
+    return text
 
 
 def test_normalize_empty_or_none():
@@ -21,3 +38,54 @@ def test_normalize_duplicate_letters():
 
 def test_normalize_special_characters():
     assert normalize("Иванов И.И. (профессор) @123!") == "иванов ии професор 123"
+
+
+CASES = [
+    "",
+    None,
+    "Привет, Мир!",
+    "Ёлка Фёдор",
+    "Пррииввеетт",
+    "Иванов И.И. (профессор) @123!",
+    "а!!а",
+    "ЁЁё ееЕ",
+    "x\n\ny\t\tz\u00a0\u00a0w",
+    "İstanbul ß ﬁ Σς",
+    "ℹ️ эмодзи 🙂🙂 и №5",
+]
+
+
+def test_normalize_matches_reference():
+    for text in CASES:
+        assert normalize(text) == reference_normalize(text), text
+        assert normalize_query(text) == reference_normalize(text), text
+
+
+def test_normalize_matches_reference_on_generated_text():
+    fake = Faker("ru_RU")
+    fake.seed_instance(6)
+    rnd = random.Random(6)
+    texts = [fake.name() for _ in range(300)] + [fake.sentence() for _ in range(300)]
+    # Произвольные символы, включая пунктуацию и не-BMP
+    alphabet = "аАёЁzZ09 .,!?-_()\t\n" + "".join(
+        chr(rnd.randrange(0x20, 0x1FFFF)) for _ in range(200)
+    )
+    texts += ["".join(rnd.choices(alphabet, k=rnd.randint(1, 40))) for _ in range(500)]
+    for text in texts:
+        assert normalize(text) == reference_normalize(text), repr(text)
+
+
+def test_normalize_query_is_memoized_and_bounded():
+    normalize_query.cache_clear()
+    normalize_query("Петров")
+    normalize_query("Петров")
+    info = normalize_query.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+    assert info.maxsize == QUERY_CACHE_SIZE
+
+
+def test_whitespace_is_what_python_splits_on():
+    """WHITESPACE, которую SQL-версия normalize() меняет на пробелы"""
+    spaces = "".join(c for c in map(chr, range(0x110000)) if c.isspace())
+    assert " " + WHITESPACE == " " + spaces.replace(" ", "")
+    assert all(re.fullmatch(r"\s", c) for c in WHITESPACE)
@@ -2,34 +2,20 @@ from unittest.mock import MagicMock
 
 import pytest
 
-from core.cache import get_data_version
-from services.reviews import ReviewsService
+from core.cache import data_versions
+from services.reviews import CacheSnapshot, ReviewsService
 
 
 @pytest.fixture(autouse=True)
 def reset_cache():
     """Сбрасываем кеш перед каждым тестом"""
-    ReviewsService._version = None
-    ReviewsService._teachers_cache = []
-    ReviewsService._subjects_cache = []
-    ReviewsService._registry = None
+    ReviewsService._snapshot = CacheSnapshot()
     yield
-    ReviewsService._version = None
-    ReviewsService._teachers_cache = []
-    ReviewsService._subjects_cache = []
-    ReviewsService._registry = None
+    ReviewsService._snapshot = CacheSnapshot()
 
 
 async def test_registry_returns_cached_data(mock_db):
     """Метод registry вызывает reload_cache и возвращает кешированный RegistryResponse."""
-    teachers_data = [(1, "Иванов И.И.")]
-    mock_teachers = MagicMock()
-    mock_teachers.all.return_value = teachers_data
-
-    subjects_data = [(10, "Математика")]
-    mock_subjects = MagicMock()
-    mock_subjects.all.return_value = subjects_data
-
     teacher = MagicMock()
     teacher.id = 1
     teacher.name = "Иванов И.И."
@@ -45,7 +31,7 @@ async def test_registry_returns_cached_data(mock_db):
     mock_insights_result = MagicMock()
     mock_insights_result.scalars.return_value = [mock_insight]
 
-    mock_db.execute.side_effect = [mock_teachers, mock_subjects, mock_insights_result]
+    mock_db.execute.side_effect = [mock_insights_result]
 
     service = ReviewsService(mock_db)
     registry = await service.registry()
@@ -55,20 +41,12 @@ async def test_registry_returns_cached_data(mock_db):
     assert registry.normalized == {"иванови.и.": 1}
     assert len(registry.insights) == 1
     assert registry.insights[1].rating_value == "POSITIVE"
-    assert ReviewsService._registry is registry
-    assert ReviewsService._version == get_data_version()
+    assert ReviewsService._snapshot.registry is registry
+    assert ReviewsService._snapshot.registry_version == data_versions.get()
 
 
 async def test_registry_skips_insights_without_teacher(mock_db):
     """Инсайты без привязанного учителя игнорируются."""
-    teachers_data = [(1, "Иванов")]
-    mock_teachers = MagicMock()
-    mock_teachers.all.return_value = teachers_data
-
-    subjects_data = [(10, "Математика")]
-    mock_subjects = MagicMock()
-    mock_subjects.all.return_value = subjects_data
-
     teacher = MagicMock()
     teacher.id = 1
     teacher.name = "Иванов"
@@ -88,7 +66,7 @@ async def test_registry_skips_insights_without_teacher(mock_db):
     mock_insights_result = MagicMock()
     mock_insights_result.scalars.return_value = [mock_insight1, mock_insight2]
 
-    mock_db.execute.side_effect = [mock_teachers, mock_subjects, mock_insights_result]
+    mock_db.execute.side_effect = [mock_insights_result]
 
     service = ReviewsService(mock_db)
     registry = await service.registry()
@@ -101,14 +79,6 @@ async def test_registry_skips_insights_without_teacher(mock_db):
 
 async def test_registry_normalization_consistency(mock_db):
     """Проверка, что нормализация имён в registry работает единообразно."""
-    teachers_data = [(1, "Иванов И. И."), (2, "петров   п.п.")]
-    mock_teachers = MagicMock()
-    mock_teachers.all.return_value = teachers_data
-
-    subjects_data = [(10, "Математика")]
-    mock_subjects = MagicMock()
-    mock_subjects.all.return_value = subjects_data
-
     teacher1 = MagicMock()
     teacher1.id = 1
     teacher1.name = "Иванов И. И."
@@ -136,7 +106,7 @@ async def test_registry_normalization_consistency(mock_db):
     mock_insights_result = MagicMock()
     mock_insights_result.scalars.return_value = [mock_insight1, mock_insight2]
 
-    mock_db.execute.side_effect = [mock_teachers, mock_subjects, mock_insights_result]
+    mock_db.execute.side_effect = [mock_insights_result]
 
     service = ReviewsService(mock_db)
     registry = await service.registry()
@@ -145,3 +115,30 @@ async def test_registry_normalization_consistency(mock_db):
         "иванови.и.": 1,
         "петровп.п.": 2,
     }
+
+
+async def test_registry_body_serialized_once_per_version(mock_db):
+    """registry_body сериализует реестр один раз на версию данных."""
+    teacher = MagicMock()
+    teacher.id = 1
+    teacher.name = "Иванов И.И."
+
+    mock_insight = MagicMock()
+    mock_insight.teacher = teacher
+    mock_insight.rating_value = "POSITIVE"
+    mock_insight.confidence_value = "HIGH"
+
+    mock_insights_result = MagicMock()
+    mock_insights_result.scalars.return_value = [mock_insight]
+
+    mock_db.execute.side_effect = [mock_insights_result]
+
+    service = ReviewsService(mock_db)
+    body = await service.registry_body()
+
+    assert (
+        body.body
+        == ReviewsService._snapshot.registry.model_dump_json(exclude_none=True).encode()
+    )
+    assert await service.registry_body() is body
+    assert mock_db.execute.call_count == 1
@@ -1,23 +1,25 @@
-from unittest.mock import MagicMock
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from core.cache import get_data_version, touch_data_version
-from services.reviews import ReviewsService
+from core.cache import CATALOG, REGISTRY, data_versions, touch_data_version
+from core.config import settings
+from enums.reviews import SearchType
+from services.reviews import CacheSnapshot, ReviewsService
+
+
+def catalog(cat: SearchType) -> list[dict]:
+    return ReviewsService._snapshot.search_index.items(cat)
 
 
 @pytest.fixture(autouse=True)
 def reset_cache():
     """Сбрасываем кеш перед каждым тестом"""
-    ReviewsService._version = None
-    ReviewsService._teachers_cache = []
-    ReviewsService._subjects_cache = []
-    ReviewsService._registry = None
+    ReviewsService._snapshot = CacheSnapshot()
     yield
-    ReviewsService._version = None
-    ReviewsService._teachers_cache = []
-    ReviewsService._subjects_cache = []
-    ReviewsService._registry = None
+    ReviewsService._snapshot = CacheSnapshot()
 
 
 async def test_reload_cache_success(mock_db):
@@ -65,17 +67,18 @@ async def test_reload_cache_success(mock_db):
     service = ReviewsService(mock_db)
     await service.reload_cache()
 
-    assert ReviewsService._version == get_data_version()
-    assert ReviewsService._teachers_cache == [
+    assert ReviewsService._snapshot.catalog_version == data_versions.get()
+    assert ReviewsService._snapshot.registry_version == data_versions.get()
+    assert catalog(SearchType.teacher) == [
         {"title": "Иванов И.И.", "id": 1},
         {"title": "Петров П.П.", "id": 2},
     ]
-    assert ReviewsService._subjects_cache == [
+    assert catalog(SearchType.subject) == [
         {"title": "Математика", "id": 10},
         {"title": "Физика", "id": 20},
     ]
 
-    registry = ReviewsService._registry
+    registry = ReviewsService._snapshot.registry
     assert registry is not None
     assert registry.original == {
         "Иванов И.И.": 1,
@@ -160,10 +163,10 @@ async def test_reload_cache_reload_when_version_changed(mock_db):
 
     service = ReviewsService(mock_db)
     await service.reload_cache()
-    initial_version = ReviewsService._version
+    initial_version = ReviewsService._snapshot.catalog_version
 
-    touch_data_version()
-    new_version = get_data_version()
+    touch_data_version(CATALOG, REGISTRY)
+    new_version = data_versions.get(CATALOG)
     assert new_version != initial_version
 
     teachers_data2 = [(2, "Петров")]
@@ -197,8 +200,227 @@ async def test_reload_cache_reload_when_version_changed(mock_db):
 
     await service.reload_cache()
 
-    assert ReviewsService._version == new_version
-    assert ReviewsService._teachers_cache == [{"title": "Петров", "id": 2}]
-    assert ReviewsService._subjects_cache == [{"title": "Физика", "id": 20}]
-    assert ReviewsService._registry.original == {"Петров": 2}
-    assert ReviewsService._registry.insights[2].rating_value == "EXCELLENT"
+    assert ReviewsService._snapshot.catalog_version == new_version
+    assert catalog(SearchType.teacher) == [{"title": "Петров", "id": 2}]
+    assert catalog(SearchType.subject) == [{"title": "Физика", "id": 20}]
+    assert ReviewsService._snapshot.registry.original == {"Петров": 2}
+    assert ReviewsService._snapshot.registry.insights[2].rating_value == "EXCELLENT"
+
+
+async def test_reload_cache_reloads_only_changed_part(mock_db):
+    """Изменение реестра (инсайты) не перечитывает каталог поиска и наоборот."""
+    mock_teachers = MagicMock()
+    mock_teachers.all.return_value = [(1, "Иванов")]
+    mock_subjects = MagicMock()
+    mock_subjects.all.return_value = []
+    mock_insights_result = MagicMock()
+    mock_insights_result.scalars.return_value = []
+    mock_db.execute.side_effect = [mock_teachers, mock_subjects, mock_insights_result]
+
+    service = ReviewsService(mock_db)
+    await service.reload_cache()
+
+    mock_db.execute.reset_mock()
+    mock_db.execute.side_effect = [mock_insights_result]
+    touch_data_version(REGISTRY)
+    await service.reload_cache()
+    assert mock_db.execute.call_count == 1
+
+    # Версия страницы преподавателя не затрагивает ни каталог, ни реестр
+    mock_db.execute.reset_mock()
+    touch_data_version("teacher:1")
+    await service.reload_cache()
+    mock_db.execute.assert_not_called()
+
+    # Поиск не ждёт перезагрузки реестра
+    mock_db.execute.side_effect = [mock_teachers, mock_subjects]
+    touch_data_version(CATALOG, REGISTRY, "subject:10")
+    await service.reload_cache(CATALOG)
+    assert mock_db.execute.call_count == 2
+
+
+async def test_reload_cache_fetches_only_changed_entities(mock_db, monkeypatch):
+    """Каталог и реестр дочитывают только затронутые строки и правятся на месте."""
+    in_thread = []
+    to_thread = asyncio.to_thread
+
+    async def spy(func, *args):
+        in_thread.append(func.__name__)
+        return await to_thread(func, *args)
+
+    monkeypatch.setattr(asyncio, "to_thread", spy)
+    mock_teachers = MagicMock()
+    mock_teachers.all.return_value = [(1, "Иванов"), (2, "Петров")]
+    mock_subjects = MagicMock()
+    mock_subjects.all.return_value = [(10, "Математика"), (20, "Физика")]
+    teacher = MagicMock()
+    teacher.id, teacher.name = 2, "Петров"
+    insight = MagicMock(
+        teacher=teacher, rating_value="POSITIVE", confidence_value="HIGH"
+    )
+    mock_insights = MagicMock()
+    mock_insights.scalars.return_value = [insight]
+    mock_db.execute.side_effect = [mock_teachers, mock_subjects, mock_insights]
+
+    service = ReviewsService(mock_db)
+    await service.reload_cache()
+
+    # Преподавателя 2 переименовали, 3 добавили, предмет 20 удалили
+    touch_data_version(CATALOG, REGISTRY, "teacher:2", "teacher:3", "subject:20")
+    mock_changed_teachers = MagicMock()
+    mock_changed_teachers.all.return_value = [(2, "Петрова"), (3, "Сидоров")]
+    mock_changed_subjects = MagicMock()
+    mock_changed_subjects.all.return_value = []
+    teacher.name = "Петрова"
+    mock_db.execute.reset_mock()
+    mock_db.execute.side_effect = [
+        mock_changed_teachers,
+        mock_changed_subjects,
+        mock_insights,
+    ]
+    await service.reload_cache()
+
+    statements = [str(c.args[0]) for c in mock_db.execute.call_args_list]
+    assert len(statements) == 3
+    # Правка копии индекса не держит цикл событий
+    assert in_thread.count("updated") == 2
+    assert all(" IN " in stmt for stmt in statements)
+    assert catalog(SearchType.teacher) == [
+        {"title": "Иванов", "id": 1},
+        {"title": "Петрова", "id": 2},
+        {"title": "Сидоров", "id": 3},
+    ]
+    assert catalog(SearchType.subject) == [{"title": "Математика", "id": 10}]
+    assert ReviewsService._snapshot.registry.original == {"Петрова": 2}
+    assert ReviewsService._snapshot.registry.normalized == {"петрова": 2}
+    body = json.loads(ReviewsService._snapshot.registry_body.body)
+    assert body["original"] == {"Петрова": 2}
+
+
+def slow_results(mock_db, results: list, gate: asyncio.Event | None = None):
+    """execute отдаёт результаты по очереди, уступая цикл событий"""
+    results = iter(results)
+
+    async def execute(*args, **kwargs):
+        if gate is not None:
+            await gate.wait()
+        await asyncio.sleep(0)
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    mock_db.execute.side_effect = execute
+
+
+async def test_reload_cache_single_flight(mock_db):
+    """500 одновременных запросов после смены версии — один набор запросов к БД."""
+    mock_teachers = MagicMock()
+    mock_teachers.all.return_value = [(1, "Иванов")]
+    mock_subjects = MagicMock()
+    mock_subjects.all.return_value = [(10, "Математика")]
+    mock_insights = MagicMock()
+    mock_insights.scalars.return_value = []
+    slow_results(mock_db, [mock_teachers, mock_subjects, mock_insights])
+
+    touch_data_version(CATALOG, REGISTRY)
+    await asyncio.gather(*(ReviewsService(mock_db).reload_cache() for _ in range(500)))
+
+    assert mock_db.execute.call_count == 3
+    assert catalog(SearchType.teacher) == [{"title": "Иванов", "id": 1}]
+    assert ReviewsService._reloads == {}
+
+
+async def test_reload_cache_single_flight_retries_failed_reload(mock_db):
+    """Если перезагрузка упала, ожидавший запрос выполняет её сам."""
+    mock_insights = MagicMock()
+    mock_insights.scalars.return_value = []
+    slow_results(mock_db, [ConnectionError(), mock_insights])
+
+    first = asyncio.ensure_future(ReviewsService(mock_db).reload_cache(REGISTRY))
+    second = asyncio.ensure_future(ReviewsService(mock_db).reload_cache(REGISTRY))
+    results = await asyncio.gather(first, second, return_exceptions=True)
+
+    assert isinstance(results[0], ConnectionError)
+    assert results[1] is None
+    assert mock_db.execute.call_count == 2
+    assert ReviewsService._snapshot.registry.original == {}
+
+
+async def test_reload_cache_stale_while_revalidate(mock_db, monkeypatch):
+    """В режиме stale-while-revalidate запросы не ждут перезагрузки."""
+    monkeypatch.setattr(settings, "CACHE_STALE_WHILE_REVALIDATE", True)
+    mock_insights = MagicMock()
+    mock_insights.scalars.return_value = []
+    mock_db.execute.side_effect = [mock_insights]
+    await ReviewsService(mock_db).reload_cache(REGISTRY)
+    stale = ReviewsService._snapshot.registry
+
+    gate = asyncio.Event()
+    slow_results(mock_db, [mock_insights], gate)
+    touch_data_version(REGISTRY)
+    leader = asyncio.ensure_future(ReviewsService(mock_db).registry())
+    await asyncio.sleep(0)
+
+    # Пока первый запрос ждёт БД, остальные получают прежний реестр
+    assert await ReviewsService(mock_db).registry() is stale
+    assert not leader.done()
+
+    gate.set()
+    assert await leader is not stale
+
+
+async def test_reload_cache_swaps_snapshot_atomically(mock_db):
+    """Каталог подменяется целиком и не затирает параллельно загруженный реестр."""
+    mock_teachers = MagicMock()
+    mock_teachers.all.return_value = [(1, "Иванов")]
+    mock_subjects = MagicMock()
+    mock_subjects.all.return_value = [(10, "Математика")]
+    mock_insights = MagicMock()
+    mock_insights.scalars.return_value = []
+    mock_db.execute.side_effect = [mock_teachers, mock_subjects, mock_insights]
+    await ReviewsService(mock_db).reload_cache()
+    old = ReviewsService._snapshot
+
+    touch_data_version(CATALOG, REGISTRY, "teacher:1", "subject:10")
+    renamed_teacher = MagicMock()
+    renamed_teacher.all.return_value = [(1, "Иванова")]
+    renamed_subject = MagicMock()
+    renamed_subject.all.return_value = [(10, "Физика")]
+    gate = asyncio.Event()
+    slow_results(mock_db, [renamed_teacher, renamed_subject], gate)
+    catalog_reload = asyncio.ensure_future(
+        ReviewsService(mock_db).reload_cache(CATALOG)
+    )
+    await asyncio.sleep(0)
+
+    # Реестр перезагружается другим запросом, пока каталог ждёт БД
+    other_db = AsyncMock()
+    other_db.execute.side_effect = [mock_insights]
+    await ReviewsService(other_db).reload_cache(REGISTRY)
+    assert ReviewsService._snapshot.search_index is old.search_index
+    assert catalog(SearchType.teacher) == [{"title": "Иванов", "id": 1}]
+
+    gate.set()
+    await catalog_reload
+    snapshot = ReviewsService._snapshot
+    assert snapshot.registry_version > old.registry_version
+    assert catalog(SearchType.teacher) == [{"title": "Иванова", "id": 1}]
+    assert catalog(SearchType.subject) == [{"title": "Физика", "id": 10}]
+    # Прежний снимок не изменился
+    assert old.search_index.items(SearchType.teacher) == [{"title": "Иванов", "id": 1}]
+
+
+async def test_reload_cache_postgres_backend_skips_catalog(mock_db, monkeypatch):
+    """С поиском в PostgreSQL воркер не держит каталог, грузится только registry."""
+    monkeypatch.setattr(settings, "SEARCH_BACKEND", "postgres")
+    mock_insights_result = MagicMock()
+    mock_insights_result.scalars.return_value = []
+    mock_db.execute.side_effect = [mock_insights_result]
+
+    service = ReviewsService(mock_db)
+    await service.reload_cache()
+
+    assert mock_db.execute.call_count == 1
+    assert ReviewsService._snapshot.search_index is None
+    assert ReviewsService._snapshot.registry.original == {}
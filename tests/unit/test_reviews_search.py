@@ -1,18 +1,35 @@
-from unittest.mock import AsyncMock
+from dataclasses import replace
+from unittest.mock import AsyncMock, MagicMock
 
+import prometheus_client
 import pytest
+from sqlalchemy.dialects import postgresql
 
+from core.cache import (
+    CATALOG,
+    REGISTRY,
+    data_versions,
+    touch_data_version,
+)
+from core.config import settings
 from enums.reviews import SearchType
-from services.reviews import ReviewsService
+from services.reviews import CacheSnapshot, ReviewsService
+from services.search import SearchIndex
+
+
+def loaded_catalog(teachers: list[dict]) -> CacheSnapshot:
+    """Снимок с каталогом, загруженным при текущей версии данных"""
+    return CacheSnapshot(
+        catalog_version=data_versions.get(), search_index=SearchIndex(teachers, [])
+    )
 
 
 @pytest.fixture(autouse=True)
 def reset_cache():
-    ReviewsService._teachers_cache = []
-    ReviewsService._subjects_cache = []
-    ReviewsService._cache_loaded = False
+    ReviewsService._snapshot = CacheSnapshot(search_index=SearchIndex([], []))
+    ReviewsService._search_cache.clear()
     yield
-    ReviewsService._cache_loaded = False
+    ReviewsService._snapshot = CacheSnapshot()
 
 
 async def test_search_loads_cache_if_not_loaded(mock_db):
@@ -24,7 +41,9 @@ async def test_search_loads_cache_if_not_loaded(mock_db):
 
 
 async def test_search_empty_query_returns_empty_results(mock_db):
-    ReviewsService._cache_loaded = True
+    ReviewsService._snapshot = CacheSnapshot(
+        catalog_version=data_versions.get(CATALOG), search_index=SearchIndex([], [])
+    )
     service = ReviewsService(mock_db)
 
     res = await service.search("", None)
@@ -32,9 +51,13 @@ async def test_search_empty_query_returns_empty_results(mock_db):
 
 
 async def test_search_exact_match_and_strainer(mock_db):
-    ReviewsService._cache_loaded = True
-    ReviewsService._teachers_cache = [{"id": 1, "title": "Иванов Иван"}]
-    ReviewsService._subjects_cache = [{"id": 2, "title": "Иван и Математика"}]
+    ReviewsService._snapshot = CacheSnapshot(
+        catalog_version=data_versions.get(CATALOG),
+        search_index=SearchIndex(
+            [{"id": 1, "title": "Иванов Иван"}],
+            [{"id": 2, "title": "Иван и Математика"}],
+        ),
+    )
 
     service = ReviewsService(mock_db)
 
@@ -43,3 +66,73 @@ async def test_search_exact_match_and_strainer(mock_db):
     assert len(res.results) == 1
     assert res.results[0].id == 1
     assert res.results[0].type == SearchType.teacher
+
+
+async def test_search_postgres_backend_ranks_database_candidates(mock_db, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_BACKEND", "postgres")
+    teachers = MagicMock()
+    teachers.all.return_value = [(2, "Петров Иван"), (1, "Иванов Иван")]
+    subjects = MagicMock()
+    subjects.all.return_value = [(3, "Ивановедение")]
+    mock_db.execute.side_effect = [MagicMock(), teachers, subjects]
+
+    service = ReviewsService(mock_db)
+    service.reload_cache = AsyncMock()
+    res = await service.search("иванов", None)
+
+    service.reload_cache.assert_not_called()
+    assert [(r.id, r.type) for r in res.results] == [
+        (1, SearchType.teacher),
+        (3, SearchType.subject),
+    ]
+    # set_config порога word_similarity + по запросу на каждую категорию
+    assert mock_db.execute.call_count == 3
+    sql = str(
+        mock_db.execute.call_args_list[1].args[0].compile(dialect=postgresql.dialect())
+    )
+    assert "search_title %%> " in sql
+    assert "LIMIT" in sql
+
+
+def cache_requests(result):
+    return (
+        prometheus_client.REGISTRY.get_sample_value(
+            "reviews_search_cache_requests_total", {"result": result}
+        )
+        or 0
+    )
+
+
+async def test_search_repeated_query_served_from_cache(mock_db):
+    ReviewsService._snapshot = loaded_catalog([{"id": 1, "title": "Иванов Иван"}])
+    service = ReviewsService(mock_db)
+    hits, misses = cache_requests("hit"), cache_requests("miss")
+
+    first = await service.search("Иванов", None)
+    # Другое написание того же запроса нормализуется в тот же ключ
+    ReviewsService._snapshot = replace(
+        ReviewsService._snapshot, search_index=SearchIndex([], [])
+    )
+    second = await service.search("  ИВАНОВ!", None)
+
+    assert second is first
+    assert cache_requests("hit") == hits + 1
+    assert cache_requests("miss") == misses + 1
+
+
+async def test_search_cache_invalidated_by_catalog_version(mock_db):
+    ReviewsService._snapshot = loaded_catalog([{"id": 1, "title": "Иванов Иван"}])
+    service = ReviewsService(mock_db)
+    service.reload_cache = AsyncMock()
+
+    assert [r.id for r in (await service.search("иванов", None)).results] == [1]
+
+    # Изменения вне каталога (инсайты в реестре) не сбрасывают поиск
+    touch_data_version(REGISTRY, "teacher:1")
+    assert [r.id for r in (await service.search("иванов", None)).results] == [1]
+
+    # Правка имени в админке меняет версию каталога, перезагруженный каталог —
+    # ключ кеша
+    touch_data_version(CATALOG)
+    ReviewsService._snapshot = loaded_catalog([{"id": 2, "title": "Иванов Пётр"}])
+    assert [r.id for r in (await service.search("иванов", None)).results] == [2]
@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock
 
 import pytest
+from sqlalchemy.dialects import postgresql
 
 from schemas.insights import Confidence, InsightsShort, Rating
 from schemas.reviews import SubjectResponse, TeacherShort
@@ -29,14 +30,10 @@ async def test_subject_found_with_teachers(mock_db):
     mock_insight.confidence_value = "HIGH"
     mock_insight.confidence_reason = "много оценок"
 
-    mock_comment = MagicMock()
-    mock_comment.text = "Очень понятно объясняет!"
-
     mock_teacher = MagicMock()
     mock_teacher.id = 5
     mock_teacher.name = "Петров П.П."
     mock_teacher.insight = mock_insight
-    mock_teacher.comments = [mock_comment]
 
     mock_subject = MagicMock()
     mock_subject.id = 10
@@ -44,6 +41,8 @@ async def test_subject_found_with_teachers(mock_db):
     mock_subject.teachers = [mock_teacher]
 
     mock_db.scalar.return_value = mock_subject
+    # Последний отзыв каждого преподавателя: (teacher_id, text)
+    mock_db.execute.return_value.all.return_value = [(5, "Очень понятно объясняет!")]
     service = ReviewsService(mock_db)
 
     res = await service.subject(10)
@@ -81,7 +80,6 @@ async def test_subject_found_with_teacher_no_insight(mock_db):
     mock_teacher.id = 7
     mock_teacher.name = "Сидоров С.С."
     mock_teacher.insight = None
-    mock_teacher.comments = [MagicMock(text="Хороший преподаватель")]
 
     mock_subject = MagicMock()
     mock_subject.id = 20
@@ -89,6 +87,7 @@ async def test_subject_found_with_teacher_no_insight(mock_db):
     mock_subject.teachers = [mock_teacher]
 
     mock_db.scalar.return_value = mock_subject
+    mock_db.execute.return_value.all.return_value = [(7, "Хороший преподаватель")]
     service = ReviewsService(mock_db)
 
     res = await service.subject(20)
@@ -105,7 +104,6 @@ async def test_subject_found_with_no_comments(mock_db):
     mock_teacher.id = 8
     mock_teacher.name = "Кузнецов К.К."
     mock_teacher.insight = None
-    mock_teacher.comments = []
 
     mock_subject = MagicMock()
     mock_subject.id = 30
@@ -113,8 +111,36 @@ async def test_subject_found_with_no_comments(mock_db):
     mock_subject.teachers = [mock_teacher]
 
     mock_db.scalar.return_value = mock_subject
+    mock_db.execute.return_value.all.return_value = []
     service = ReviewsService(mock_db)
 
     res = await service.subject(30)
     teacher = res.teachers[0]
     assert teacher.alt is None
+
+
+@pytest.mark.asyncio
+async def test_subject_alt_is_latest_comment_excerpt(mock_db):
+    mock_subject = MagicMock()
+    mock_subject.id = 40
+    mock_subject.title = "Химия"
+    mock_subject.teachers = [
+        MagicMock(id=1, insight=None),
+        MagicMock(id=2, insight=None),
+    ]
+    mock_subject.teachers[0].name = "Иванов И.И."
+    mock_subject.teachers[1].name = "Петров П.П."
+
+    long_text = " ".join(f"слово{i}" for i in range(40))
+    mock_db.scalar.return_value = mock_subject
+    mock_db.execute.return_value.all.return_value = [(1, long_text)]
+    service = ReviewsService(mock_db)
+
+    res = await service.subject(40)
+
+    # Одним запросом DISTINCT ON читается только последний отзыв
+    stmt = str(mock_db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "DISTINCT ON (public.comment.teacher_id)" in stmt
+    assert "ORDER BY public.comment.teacher_id, public.comment.id DESC" in stmt
+    assert res.teachers[0].alt == " ".join(f"слово{i}" for i in range(20)) + "..."
+    assert res.teachers[1].alt is None
@@ -2,17 +2,27 @@ from unittest.mock import MagicMock
 
 import pytest
 
+from core.cache import response_cache, touch_data_version
+from core.config import settings
 from schemas.insights import (
     Confidence,
     Rating,
     Scores,
 )
 from schemas.reviews import (
+    CommentsPage,
     TeacherResponse,
 )
 from services.reviews import ReviewsService
 
 
+@pytest.fixture(autouse=True)
+def reset_response_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
 @pytest.mark.asyncio
 async def test_teacher_not_found(mock_db):
     mock_db.scalar.return_value = None
@@ -30,7 +40,6 @@ async def test_teacher_found_without_insight(mock_db):
     mock_teacher.name = "Иванов И.И."
     mock_teacher.insight = None
     mock_teacher.summaries = []
-    mock_teacher.comments = []
 
     mock_db.scalar.return_value = mock_teacher
     service = ReviewsService(mock_db)
@@ -88,9 +97,9 @@ async def test_teacher_found_with_full_data(mock_db):
     mock_teacher.name = "Иванов И.И."
     mock_teacher.insight = mock_insight
     mock_teacher.summaries = [mock_summary1, mock_summary2]
-    mock_teacher.comments = [mock_comment]
 
     mock_db.scalar.return_value = mock_teacher
+    mock_db.return_data([mock_comment])
     service = ReviewsService(mock_db)
 
     res = await service.teacher(1)
@@ -134,3 +143,108 @@ async def test_teacher_found_with_full_data(mock_db):
     assert comment.source.title == "ВКонтакте"
     assert comment.source.link == "https://vk.com/..."
     assert comment.subject.title == "Алгебра"
+    assert res.next is None
+
+
+def make_comment(iid=5, subject_id=7):
+    comment = MagicMock(id=iid, date="01.01.2024", text="Норм")
+    comment.subject = MagicMock(title="Математика")
+    comment.subject_id = subject_id
+    comment.source = MagicMock(title="Чат", link=None)
+    comment.source_id = 3
+    return comment
+
+
+def make_teacher(name="Иванов И.И."):
+    teacher = MagicMock(insight=None, summaries=[])
+    teacher.id = 1
+    teacher.name = name
+    return teacher
+
+
+async def test_teacher_comments_page(mock_db):
+    mock_db.scalar.return_value = make_teacher()
+    mock_db.return_data([make_comment(i) for i in (3, 5, 8)])
+    service = ReviewsService(mock_db)
+
+    res = await service.teacher(1, limit=2, after=1)
+
+    # Третий комментарий только показывает, что есть следующая страница
+    assert [c.id for c in res.comments] == [3, 5]
+    assert res.next == 5
+    stmt = mock_db.scalars.call_args.args[0]
+    sql = str(stmt.compile(compile_kwargs={"literal_binds": True}))
+    assert "public.comment.teacher_id = 1 AND public.comment.id > 1" in sql
+    assert sql.endswith("ORDER BY public.comment.id\n LIMIT 3")
+
+
+async def test_comments_body_of_missing_teacher(mock_db):
+    mock_db.scalar.return_value = None
+    service = ReviewsService(mock_db)
+
+    assert await service.comments_body(1) is None
+    mock_db.scalars.assert_not_called()
+
+
+async def test_comments_body(mock_db):
+    mock_db.scalar.return_value = 1
+    mock_db.return_data([make_comment(i) for i in (3, 5)])
+    service = ReviewsService(mock_db)
+
+    body = await service.comments_body(1, limit=2)
+    page = CommentsPage.model_validate_json(body.body)
+    assert [c.id for c in page.comments] == [3, 5]
+    assert page.next is None
+    assert await service.comments_body(1, limit=2) is body
+
+
+async def test_teacher_body_cached_per_page(mock_db):
+    mock_db.scalar.return_value = make_teacher()
+    service = ReviewsService(mock_db)
+
+    mock_db.return_data([make_comment(5, subject_id=7)])
+    first = await service.teacher_body(1)
+    mock_db.return_data([make_comment(9, subject_id=8)])
+    second = await service.teacher_body(1, after=5)
+    assert first is not second
+    assert await service.teacher_body(1, settings.COMMENTS_PAGE_SIZE) is first
+    assert mock_db.scalars.call_count == 2
+
+    # Страницы версионируются только преподавателем: правка предмета
+    # касается его сама, см. page_resources
+    touch_data_version("subject:7")
+    assert await service.teacher_body(1) is first
+    touch_data_version("teacher:1")
+    assert await service.teacher_body(1) is not first
+    assert mock_db.scalars.call_count == 3
+
+
+async def test_teacher_body_cached_until_invalidated(mock_db):
+    mock_db.scalar.return_value = make_teacher()
+    mock_db.return_data([make_comment()])
+    service = ReviewsService(mock_db)
+
+    body = await service.teacher_body(1)
+    assert TeacherResponse.model_validate_json(body.body).name == "Иванов И.И."
+    assert await service.teacher_body(1) is body
+    mock_db.scalar.assert_called_once()
+
+    mock_db.scalar.return_value = make_teacher("Иванов И.")
+    touch_data_version("teacher:1")
+    body = await service.teacher_body(1)
+    assert TeacherResponse.model_validate_json(body.body).name == "Иванов И."
+    assert mock_db.scalar.call_count == 2
+
+
+async def test_teacher_body_not_served_if_changed_while_loading(mock_db):
+    service = ReviewsService(mock_db)
+
+    async def load_and_edit(stmt):
+        # Админка сохранила изменения, пока запрос читал старые данные
+        touch_data_version("teacher:1")
+        return make_teacher()
+
+    mock_db.scalar.side_effect = load_and_edit
+    await service.teacher_body(1)
+    await service.teacher_body(1)
+    assert mock_db.scalar.call_count == 2
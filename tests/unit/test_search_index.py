@@ -0,0 +1,192 @@
+import random
+from unittest.mock import patch
+
+from faker import Faker
+from rapidfuzz import fuzz
+
+from enums.reviews import SearchType
+from services.search import NgramIndex, PrefixIndex, SearchIndex, normalize
+
+BOTH = [SearchType.teacher, SearchType.subject]
+
+
+def sequential_search(query, teachers, subjects):
+    """Исходный алгоритм /search: нормализация и partial_ratio по одному"""
+    raw = []
+    for cat, items in ((SearchType.teacher, teachers), (SearchType.subject, subjects)):
+        for item in items:
+            target = normalize(item["title"])
+            if query in target:
+                score, priority = 100, 1 if target.startswith(query) else 2
+            else:
+                score, priority = fuzz.partial_ratio(query, target), 3
+            if score >= (75 if priority < 3 else 85):
+                raw.append(
+                    (priority, -score, item["title"].split()[0], item["id"], cat)
+                )
+    raw.sort(key=lambda x: x[:3])
+    return [(item_id, cat) for *_, item_id, cat in raw[:20]]
+
+
+def make_index():
+    return SearchIndex(
+        teachers=[
+            {"id": 1, "title": "Петров Иван Сергеевич"},
+            {"id": 2, "title": "Иванов Пётр Ильич"},
+            {"id": 3, "title": "Сидоров Сидор"},
+        ],
+        subjects=[
+            {"id": 10, "title": "Ивановедение"},
+            {"id": 20, "title": "Математический анализ"},
+        ],
+    )
+
+
+def test_search_prefix_before_substring():
+    res = make_index().search("иван", BOTH)
+    # startswith → приоритет 1 (по первому слову), вхождение в середину → 2
+    assert [(r.id, r.type) for r in res] == [
+        (2, SearchType.teacher),
+        (10, SearchType.subject),
+        (1, SearchType.teacher),
+    ]
+
+
+def test_search_strainer_limits_categories():
+    res = make_index().search("иван", [SearchType.subject])
+    assert [r.id for r in res] == [10]
+
+
+def test_search_fuzzy_threshold():
+    index = make_index()
+    # Опечатка: partial_ratio >= 85
+    assert [r.id for r in index.search("матиматический", BOTH)] == [20]
+    # Слишком далеко от любого названия
+    assert index.search("физика", BOTH) == []
+
+
+def test_search_uses_precomputed_normalization():
+    index = SearchIndex([{"id": 1, "title": "Фёдоров   Ёлкин!"}], [])
+    res = index.search("федоров елкин", [SearchType.teacher])
+    assert [r.title for r in res] == ["Фёдоров   Ёлкин!"]
+
+
+def test_search_respects_limit():
+    teachers = [{"id": i, "title": f"Иванов {i}"} for i in range(30)]
+    index = SearchIndex(teachers, [])
+    assert len(index.search("иванов", BOTH)) == 20
+    assert len(index.search("иванов", BOTH, limit=5)) == 5
+
+
+def test_search_matches_sequential_scan():
+    fake = Faker("ru_RU")
+    fake.seed_instance(0)
+    teachers = [{"id": i, "title": fake.name()} for i in range(500)]
+    subjects = [{"id": i, "title": fake.job()} for i in range(500)]
+    index = SearchIndex(teachers, subjects)
+
+    queries = ["ив", "ова", "инженер", "алекснадр", "петрович", "ме неджер"]
+    queries += [normalize(fake.last_name())[:n] for n in (3, 5, 8) for _ in range(10)]
+    for query in queries:
+        res = index.search(query, BOTH)
+        assert [(r.id, r.type) for r in res] == sequential_search(
+            query, teachers, subjects
+        ), query
+
+
+def test_ngram_candidates_never_drop_a_match():
+    rnd = random.Random(1)
+    for _ in range(50):
+        alphabet = "абвг д"[: rnd.randint(2, 6)]
+        texts = tuple(
+            "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 15)))
+            for _ in range(100)
+        )
+        index = NgramIndex(texts, score_cutoff=85)
+        for _ in range(10):
+            query = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 12)))
+            shortlist = index.shortlist(query)
+            if shortlist is None:
+                continue
+            matches = {
+                idx
+                for idx, text in enumerate(texts)
+                if fuzz.partial_ratio(query, text) >= 85
+            }
+            substrings = {idx for idx, text in enumerate(texts) if query in text}
+            assert matches <= set(shortlist.candidates), query
+            assert substrings <= set(shortlist.complete), query
+
+
+def test_ngram_candidates_prune_unrelated_titles():
+    index = NgramIndex(("иванов", "петров", "сидоров", "математика"), 85)
+    assert sorted(index.shortlist("иванв").candidates) == [0]
+    assert sorted(index.shortlist("ов").complete) == [0, 1, 2]
+    # Для однобуквенного запроса оценка не работает — проверяются все
+    assert index.shortlist("и") is None
+
+
+def test_prefix_index_find():
+    index = PrefixIndex(("петров", "иванов", "иван", "ивахненко", "ив"))
+    assert sorted(index.find("иван")) == [1, 2]
+    assert sorted(index.find("ив")) == [1, 2, 3, 4]
+    assert index.find("я") == []
+
+
+def test_search_skips_fuzzy_stage_when_prefix_hits_fill_the_page():
+    teachers = [{"id": i, "title": f"Иванов {i}"} for i in range(25)]
+    index = SearchIndex(teachers, [{"id": 1, "title": "Иваново"}])
+
+    with patch("services.search.process.extract") as extract:
+        res = index.search("иванов", BOTH)
+
+    extract.assert_not_called()
+    assert len(res) == 20
+    assert all(r.type == SearchType.teacher for r in res)
+
+
+def test_search_index_updated_matches_rebuild():
+    fake = Faker("ru_RU")
+    fake.seed_instance(1)
+    rnd = random.Random(2)
+    teachers = {i: fake.name() for i in range(300)}
+    index = SearchIndex([{"id": i, "title": t} for i, t in teachers.items()], [])
+    original = index
+    before = original.search("ив", BOTH)
+    postings = {
+        g: p[:] for g, p in original._ngrams[SearchType.teacher]._postings.items()
+    }
+
+    for _ in range(20):
+        removed = set(rnd.sample(sorted(teachers), 5))
+        changed = {i: fake.name() for i in rnd.sample(sorted(teachers), 10)}
+        changed |= {max(teachers) + n: fake.name() for n in range(1, 4)}
+        for i in removed:
+            del teachers[i]
+        teachers.update(changed)
+        index = index.updated(
+            SearchType.teacher,
+            [{"id": i, "title": t} for i, t in changed.items()],
+            removed - changed.keys(),
+        )
+
+    # Удалённые позиции занимают последние записи, поэтому эталон строится
+    # в порядке индекса: при равных оценках он определяет порядок выдачи
+    items = index.items(SearchType.teacher)
+    assert {item["id"]: item["title"] for item in items} == teachers
+    rebuilt = SearchIndex(items, [])
+    for query in ["ив", "ова", "алекснадр", "петрович", "а"]:
+        assert index.search(query, BOTH) == rebuilt.search(query, BOTH), query
+    patched, fresh = (
+        index._ngrams[SearchType.teacher],
+        rebuilt._ngrams[SearchType.teacher],
+    )
+    assert patched._required == fresh._required
+    assert patched._lengths == fresh._lengths
+    assert {g: sorted(p) for g, p in patched._postings.items()} == {
+        g: sorted(p) for g, p in fresh._postings.items()
+    }
+    # Исходный индекс не меняется: по нему ещё могут идти поиски
+    assert original.search("ив", BOTH) == before
+    assert original._ngrams[SearchType.teacher]._postings == postings
+    assert len(original) == 300
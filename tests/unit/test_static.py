@@ -0,0 +1,79 @@
+import gzip
+import os
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from core.static import IMMUTABLE, PrecompressedStaticFiles
+
+PAGE = b"<html>" + "Отзывы на преподавателей ".encode() * 100 + b"</html>"
+
+
+@pytest.fixture
+def public(tmp_path):
+    (tmp_path / "index.html").write_bytes(PAGE)
+    (tmp_path / "app.3f9c2b1a.js").write_bytes(b"console.log(1);" * 100)
+    (tmp_path / "robots.txt").write_bytes(b"User-agent: *")
+    return tmp_path
+
+
+def client(static: PrecompressedStaticFiles) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=static), base_url="http://test")
+
+
+async def test_static_serves_precompressed_copies(public):
+    static = PrecompressedStaticFiles(directory=public, html=True, minimum_size=100)
+    static.prepare()
+
+    assert gzip.decompress((public / "index.html.gz").read_bytes()) == PAGE
+    # Маленькие файлы не сжимаются
+    assert not (public / "robots.txt.br").exists()
+
+    async with client(static) as ac:
+        br = await ac.get("/", headers={"Accept-Encoding": "gzip, br"})
+        assert br.headers["content-encoding"] == "br"
+        assert br.headers["vary"] == "Accept-Encoding"
+        assert br.headers["cache-control"] == "no-cache"
+        assert br.content == PAGE
+
+        plain = await ac.get("/index.html", headers={"Accept-Encoding": ""})
+        assert "content-encoding" not in plain.headers
+        assert plain.content == PAGE
+        assert br.headers["etag"] == plain.headers["etag"][:-1] + '-br"'
+
+        response = await ac.get(
+            "/", headers={"Accept-Encoding": "br", "If-None-Match": br.headers["etag"]}
+        )
+        assert response.status_code == 304
+
+        response = await ac.get("/app.3f9c2b1a.js")
+        assert response.headers["cache-control"] == IMMUTABLE
+
+        response = await ac.get("/robots.txt", headers={"Accept-Encoding": "br"})
+        assert "content-encoding" not in response.headers
+        assert "vary" not in response.headers
+
+
+async def test_static_etag_is_content_hash(public):
+    static = PrecompressedStaticFiles(directory=public, minimum_size=100)
+    static.prepare()
+    async with client(static) as ac:
+        etag = (await ac.get("/robots.txt")).headers["etag"]
+
+    # Пересборка образа меняет mtime, но не содержимое
+    os.utime(public / "robots.txt", (0, 0))
+    static.prepare()
+    async with client(static) as ac:
+        assert (await ac.get("/robots.txt")).headers["etag"] == etag
+
+
+async def test_static_changed_after_prepare_is_served_as_is(public):
+    static = PrecompressedStaticFiles(directory=public, minimum_size=100)
+    static.prepare()
+    (public / "index.html").write_bytes(b"<html>new</html>")
+
+    async with client(static) as ac:
+        response = await ac.get("/index.html", headers={"Accept-Encoding": "br"})
+
+    assert response.content == b"<html>new</html>"
+    assert "content-encoding" not in response.headers